@@ -0,0 +1,165 @@
+"""
+Expectimax move advisor.
+
+The advisor searches betting and rolling moves a few turns ahead on one
+`Game`, applying them with `make_bet`/`make_roll` and taking them back with
+`unmake`. Rolls are chance nodes averaged over every die and face still in
+the pyramid. The other players are assumed to play against the advised
+player (the paranoid assumption), so their turns take the minimum.
+
+Leaves are scored with the exact leg outcome probabilities from
+`Game.leg_outcomes`: each player's pyramid tokens plus the expected payout
+of the tickets they hold. The score of a position is the advised player's
+expected leg earnings minus the average of everyone else's.
+"""
+
+import time
+from game import *
+from simulator import Strategy
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out."""
+
+
+class Advisor:
+    """Recommends moves with a depth-limited expectimax search and a transposition table."""
+
+    def __init__(self, max_depth: int = 3, time_budget: float = None, table_size: int = 200_000):
+        """`max_depth` counts player turns. With a `time_budget` in seconds the search deepens one turn at a time
+        and returns the result of the deepest search that finished in time."""
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.table_size = table_size
+        self.table = {}
+        self.deadline = None
+        self.nodes = 0
+        self.depth_reached = 0
+
+    def best_move(self, game: Game, players: list[Player], current: int) -> tuple[tuple[MoveType, Any], float]:
+        """Returns the best move for `players[current]` and its value in expected coins over the rest of the field."""
+        self.nodes = 0
+        self.depth_reached = 0
+        self.deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+
+        best = None
+        depths = range(1, self.max_depth + 1) if self.time_budget is not None else [self.max_depth]
+        for depth in depths:
+            try:
+                best = self.root(game, players, current, depth)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+
+        if best is None:
+            # not even one turn deep fit in the budget, so fall back to the cheapest sensible answer
+            best = ((MoveType.token, None), 0.0)
+        return best
+
+    def root(self, game: Game, players: list[Player], current: int, depth: int) -> tuple[tuple[MoveType, Any], float]:
+        best_move = None
+        best_value = None
+        for move in self.moves(game):
+            value = self.move_value(game, players, current, current, move, depth)
+            if best_value is None or value > best_value:
+                best_move, best_value = move, value
+        return best_move, best_value
+
+    def moves(self, game: Game) -> list[tuple[MoveType, Any]]:
+        """Returns every move available: the top ticket of each color and, while dice remain, a roll."""
+        moves = [(MoveType.bet, ticket) for ticket in game.ticket_status().values()]
+        if 0 in game.available_dice.values():
+            moves.append((MoveType.token, None))
+        return moves
+
+    def search(self, game: Game, players: list[Player], to_move: int, me: int, depth: int) -> float:
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if depth == 0 or game.is_finished_leg():
+            return self.evaluate(game, players, me)
+
+        key = self.key(game, players, to_move, me, depth)
+        if key in self.table:
+            return self.table[key]
+
+        values = [self.move_value(game, players, to_move, me, move, depth) for move in self.moves(game)]
+        value = max(values) if to_move == me else min(values)
+
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = value
+        return value
+
+    def move_value(
+        self, game: Game, players: list[Player], to_move: int, me: int, move: tuple[MoveType, Any], depth: int
+    ) -> float:
+        """Returns the value for `players[me]` of `players[to_move]` playing `move`."""
+        next_player = (to_move + 1) % len(players)
+        if move[0] == MoveType.bet:
+            undo = game.make_bet(move[1], players[to_move])
+            try:
+                return self.search(game, players, next_player, me, depth - 1)
+            finally:
+                # also runs when the search times out, so the caller's game is never left mid-search
+                game.unmake(undo)
+
+        # a roll: average over every die left in the pyramid and every face it can show
+        dice = [color for color, result in game.available_dice.items() if result == 0]
+        faces = game.faces
+        total = 0.0
+        for color in dice:
+            for face in faces:
+                undo = game.make_roll(color, face, players[to_move])
+                try:
+                    if undo.game_end:
+                        # a camel crossed the line, so the leg is settled on the spot
+                        total += self.evaluate(game, players, me, settled=True)
+                    else:
+                        total += self.search(game, players, next_player, me, depth - 1)
+                finally:
+                    game.unmake(undo)
+        return total / (len(dice) * len(faces))
+
+    def evaluate(self, game: Game, players: list[Player], me: int, settled: bool = False) -> float:
+        """Scores a position as `players[me]`'s expected leg earnings minus the average of the other players'."""
+        if settled:
+            winning_camel, second_camel = game.get_winning_camels()
+            combos = 1
+            first_place = {color: int(color == winning_camel.color) for color in game.colors}
+            second_place = {color: int(color == second_camel.color) for color in game.colors}
+        else:
+            first_place, second_place, combos = game.leg_outcomes()
+
+        earnings = []
+        for player in players:
+            total = player.get_tokens()
+            for ticket in player.get_betting_cards():
+                first, second = first_place[ticket.color], second_place[ticket.color]
+                total += (first * ticket.value + second - (combos - first - second)) / combos
+            earnings.append(total)
+
+        others = [earning for i, earning in enumerate(earnings) if i != me]
+        return earnings[me] - sum(others) / len(others)
+
+    def key(self, game: Game, players: list[Player], to_move: int, me: int, depth: int) -> tuple:
+        """Returns the transposition table key of a search node."""
+        tent = tuple(game.tickets_left.values())
+        holdings = tuple(
+            (player.get_tokens(), tuple(sorted((ticket.color.value, ticket.value) for ticket in player.get_betting_cards())))
+            for player in players
+        )
+        return (game.to_packed(), game.remaining_dice(), tent, holdings, to_move, me, depth)
+
+
+class ExpectimaxStrategy(Strategy):
+    """Plays the move recommended by an `Advisor`."""
+
+    name = "expectimax"
+
+    def __init__(self, max_depth: int = 2, time_budget: float = None):
+        self.advisor = Advisor(max_depth, time_budget)
+
+    def choose_move(self, game: Game, player: Player, players: list[Player]) -> tuple[MoveType, Any]:
+        move, _ = self.advisor.best_move(game, players, players.index(player))
+        return move
@@ -0,0 +1,203 @@
+"""
+Struct-of-arrays engine playing many games at once.
+
+`GameBatch` holds K games as NumPy arrays instead of `Game`, `Camel`,
+`BettingTicket` and `Player` objects: row k of every array is game k. Rolls,
+moves, bets and end-of-leg settlement are applied to all the rows that need
+them in one vectorized operation, so the interpreter overhead is paid once
+per step rather than once per game.
+
+    squares, heights    [K, camels]   where each camel is, 0 is the bottom of the stack
+    dice_used           [K, camels]   whether each die has left the pyramid this leg
+    tickets_taken       [K, camels]   how many tickets of each color have been taken this leg
+    bet_values          [K, players, camels]   summed values of each player's tickets on each color
+    bet_counts          [K, players, camels]   number of each player's tickets on each color
+    tokens, coins       [K, players]
+    current, finished   [K]
+
+Camels follow the order of `Color`, like `Game.camels`. Requires NumPy.
+"""
+
+from game import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TICKETS_TOP_FIRST = tuple(reversed(TICKET_VALUES))  # the ticket stack of each color, top first
+
+
+class GameBatch:
+    """K independent games advanced in lockstep."""
+
+    def __init__(self, size: int, num_players: int, num_squares: int = 16, seed: int = None):
+        """Sets up `size` fresh games for `num_players` players each, placing camels like `Game` does."""
+        if np is None:
+            raise Exception("GameBatch requires NumPy, which is not installed.")
+        assert num_players >= 2
+        self.size = size
+        self.num_players = num_players
+        self.num_camels = len(Color)
+        self.num_squares = num_squares
+        self.rng = np.random.default_rng(seed)
+        self.rows = np.arange(size)
+
+        # every camel starts on one of the first three squares, stacked in color order
+        self.squares = self.rng.integers(0, 3, (size, self.num_camels))
+        self.heights = np.zeros((size, self.num_camels), dtype=np.int64)
+        for i in range(1, self.num_camels):
+            self.heights[:, i] = (self.squares[:, :i] == self.squares[:, i : i + 1]).sum(axis=1)
+
+        self.dice_used = np.zeros((size, self.num_camels), dtype=bool)
+        self.tickets_taken = np.zeros((size, self.num_camels), dtype=np.int64)
+        self.bet_values = np.zeros((size, num_players, self.num_camels), dtype=np.int64)
+        self.bet_counts = np.zeros((size, num_players, self.num_camels), dtype=np.int64)
+        self.tokens = np.zeros((size, num_players), dtype=np.int64)
+        self.coins = np.zeros((size, num_players), dtype=np.int64)
+        self.current = np.zeros(size, dtype=np.int64)
+        self.finished = np.zeros(size, dtype=bool)
+        self.legs = np.zeros(size, dtype=np.int64)
+        self.turns = np.zeros(size, dtype=np.int64)
+
+    @classmethod
+    def from_games(cls, games: list[Game], num_players: int, seed: int = None) -> "GameBatch":
+        """Builds a batch from the boards and dice of existing games. Tickets, bets and coins start empty."""
+        batch = cls(len(games), num_players, games[0].num_squares, seed)
+        for k, game in enumerate(games):
+            for i, camel in enumerate(game.camels):
+                batch.squares[k, i], batch.heights[k, i] = game.locate(camel.color)
+                batch.dice_used[k, i] = game.available_dice[camel.color] != 0
+        return batch
+
+    def ranking(self) -> "np.ndarray":
+        """Returns the camel indices of every game ordered by race position, leader first. Shape [K, camels]."""
+        return np.argsort(-(self.squares * 8 + self.heights), axis=1)
+
+    def move(self, camels: "np.ndarray", distances: "np.ndarray", rows: "np.ndarray") -> "np.ndarray":
+        """Moves camel `camels[j]` of game `rows[j]` and everything stacked on it by `distances[j]`, like `Game.move_camel`.
+        Returns whether each move ended its game."""
+        squares = self.squares[rows]
+        heights = self.heights[rows]
+        local = np.arange(len(rows))
+        square = squares[local, camels]
+        height = heights[local, camels]
+
+        final_square = square + distances
+        game_end = final_square >= self.num_squares
+        final_square = np.minimum(final_square, self.num_squares - 1)
+
+        moving = (squares == square[:, None]) & (heights >= height[:, None])
+        moving &= (final_square != square)[:, None]
+        base = (squares == final_square[:, None]).sum(axis=1)
+
+        self.heights[rows] = np.where(moving, heights - height[:, None] + base[:, None], heights)
+        self.squares[rows] = np.where(moving, final_square[:, None], squares)
+        return game_end
+
+    def roll(self, rows: "np.ndarray") -> "np.ndarray":
+        """The current player of each game in `rows` takes a pyramid token and rolls a random unused die.
+        Returns whether each roll ended its game."""
+        # a random key per die, with used dice pushed to the bottom, picks a uniform unused die
+        keys = self.rng.random((len(rows), self.num_camels))
+        keys[self.dice_used[rows]] = -1
+        camels = keys.argmax(axis=1)
+        distances = self.rng.integers(dice_range[0], dice_range[1] + 1, len(rows))
+
+        self.dice_used[rows, camels] = True
+        self.tokens[rows, self.current[rows]] += 1
+        return self.move(camels, distances, rows)
+
+    def bet(self, colors: "np.ndarray", rows: "np.ndarray"):
+        """The current player of each game in `rows` takes the top ticket of camel `colors[j]`, which must have one left."""
+        taken = self.tickets_taken[rows, colors]
+        if (taken >= len(TICKETS_TOP_FIRST)).any():
+            raise Exception("A bet was placed on a color with no tickets left.")
+        players = self.current[rows]
+        self.bet_values[rows, players, colors] += np.array(TICKETS_TOP_FIRST)[taken]
+        self.bet_counts[rows, players, colors] += 1
+        self.tickets_taken[rows, colors] += 1
+
+    def settle(self, rows: "np.ndarray"):
+        """Ends the leg of every game in `rows`, like `Game.finish_leg`: pays out tokens and tickets, then resets them."""
+        order = self.ranking()[rows]
+        first = order[:, 0]
+        second = order[:, 1]
+        local = np.arange(len(rows))
+
+        values = self.bet_values[rows]
+        counts = self.bet_counts[rows]
+        won = values[local, :, first]
+        placed = counts[local, :, second]
+        lost = counts.sum(axis=2) - counts[local, :, first] - placed
+        self.coins[rows] += self.tokens[rows] + won + placed - lost
+
+        self.tokens[rows] = 0
+        self.bet_values[rows] = 0
+        self.bet_counts[rows] = 0
+        self.dice_used[rows] = False
+        self.tickets_taken[rows] = 0
+        self.legs[rows] += 1
+
+    def step(self, bets: "np.ndarray"):
+        """Plays one turn in every unfinished game. `bets[k]` is the camel index the current player of game k
+        bets on, or -1 to roll."""
+        active = ~self.finished
+        betting = np.flatnonzero(active & (bets >= 0))
+        rolling = np.flatnonzero(active & (bets < 0))
+
+        self.bet(bets[betting], betting)
+        game_end = np.zeros(self.size, dtype=bool)
+        game_end[rolling] = self.roll(rolling)
+
+        # the game ends mid-leg, so the bets on that leg still pay out
+        leg_over = active & (game_end | self.dice_used.all(axis=1))
+        self.settle(np.flatnonzero(leg_over))
+        self.finished |= game_end
+
+        self.turns[active] += 1
+        self.current[active] = (self.current[active] + 1) % self.num_players
+
+    def random_bets(self, bet_probability: float) -> "np.ndarray":
+        """Returns a move per game: with probability `bet_probability`, a random color that still has tickets, otherwise -1."""
+        keys = self.rng.random((self.size, self.num_camels))
+        available = self.tickets_taken < len(TICKETS_TOP_FIRST)
+        keys[~available] = -1
+        bets = keys.argmax(axis=1)
+        betting = (self.rng.random(self.size) < bet_probability) & available.any(axis=1)
+        return np.where(betting, bets, -1)
+
+    def play(self, bet_probability: float = 0.0) -> "np.ndarray":
+        """Plays every game to the end, each player betting on a random color with probability `bet_probability`
+        and rolling otherwise. Returns the final coins, shape [K, players]."""
+        while not self.finished.all():
+            self.step(self.random_bets(bet_probability))
+        return self.coins
+
+    def winners(self) -> "np.ndarray":
+        """Returns the winning seat of every game, or -1 where the top score is tied."""
+        best = self.coins.max(axis=1)
+        tied = (self.coins == best[:, None]).sum(axis=1) > 1
+        return np.where(tied, -1, self.coins.argmax(axis=1))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Simulate many games of Camel Up at once.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--bet-probability", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    batch = GameBatch(args.games, args.players, seed=args.seed)
+    batch.play(args.bet_probability)
+    seconds = time.perf_counter() - start
+    winners = batch.winners()
+    print(f"{args.games} games in {seconds:.2f}s ({args.games / seconds:.0f} games/s)")
+    for seat in range(args.players):
+        print(f"seat {seat + 1}: {(winners == seat).sum()} wins, {batch.coins[:, seat].mean():.2f} coins on average")
+    print(f"ties: {(winners == -1).sum()}, legs per game: {batch.legs.mean():.2f}, turns per game: {batch.turns.mean():.2f}")
@@ -0,0 +1,200 @@
+"""
+Benchmarks for the engine hot paths.
+
+Run `python benchmark.py` to time every case and print the results as JSON.
+`--save results.json` stores them as a baseline, and `--baseline results.json`
+compares against one, exiting with status 1 if any case got slower than the
+allowed threshold. Every case uses fixed seeds so runs are comparable.
+"""
+
+import json
+import platform
+import random
+import sys
+import time
+from game import *
+from simulator import Simulator, RollStrategy, RandomStrategy
+import batch
+
+SEED = 1234
+
+
+def stacked_game() -> Game:
+    """Returns a game with every camel stacked on one square."""
+    game = Game()
+    game.blocks = [[] for _ in range(game.num_squares)]
+    game.blocks[3] = list(game.camels)
+    return game
+
+
+def spread_game() -> Game:
+    """Returns a game with one camel per square."""
+    game = Game()
+    game.blocks = [[] for _ in range(game.num_squares)]
+    for i, camel in enumerate(game.camels):
+        game.blocks[i * 2].append(camel)
+    return game
+
+
+def bench_move_unstacked():
+    game = spread_game()
+    camel = game.get_camel(Color.green)
+
+    def run():
+        game.move_camel(camel, 1)
+        game.move_camel(camel, -1)
+
+    return run
+
+
+def bench_move_stacked():
+    game = stacked_game()
+    camel = game.blocks[3][0]
+
+    def run():
+        game.move_camel(camel, 1)
+        game.move_camel(camel, -1)
+
+    return run
+
+
+def bench_winning_camels():
+    game = spread_game()
+    return game.get_winning_camels
+
+
+def bench_EV(num_dice: int):
+    game = Game()
+    for color in list(Color)[num_dice:]:
+        game.available_dice[color] = 1
+
+    def run():
+        # measure the engine itself, not the caches or the outcomes kept from the last call
+        caches = Game.leg_cache, Game.rank_cache
+        Game.leg_cache = Game.rank_cache = None
+        game.last_outcomes = None
+        try:
+            game.EV()
+        finally:
+            Game.leg_cache, Game.rank_cache = caches
+
+    return run
+
+
+def bench_leg():
+    simulator = Simulator([RollStrategy(), RollStrategy()])
+    player = Player("bench")
+
+    def run():
+        game = Game()
+        while not game.is_finished_leg():
+            if simulator.play_move(game, player, (MoveType.token, None)):
+                break
+        game.finish_leg([player])
+
+    return run
+
+
+def bench_game():
+    simulator = Simulator([RollStrategy(), RandomStrategy(seed=SEED)])
+    return simulator.play_game
+
+
+def bench_batch():
+    def run():
+        batch.GameBatch(1000, 2, seed=SEED).play(bet_probability=0.5)
+
+    return run
+
+
+CASES = {
+    "move_camel_unstacked": bench_move_unstacked,
+    "move_camel_stacked": bench_move_stacked,
+    "get_winning_camels": bench_winning_camels,
+    **{f"EV_{n}_dice": (lambda n=n: bench_EV(n)) for n in range(5, 0, -1)},
+    "simulated_leg": bench_leg,
+    "simulated_game": bench_game,
+}
+if batch.np is not None:
+    CASES["batch_1000_games"] = bench_batch
+
+
+def time_case(make_case, min_time: float = 0.2, repeat: int = 5) -> dict:
+    """Times one case. The call count is grown until a batch takes `min_time`, then the best of `repeat` batches is kept."""
+    random.seed(SEED)
+    Game.rng.seed(SEED)
+    run = make_case()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        random.seed(SEED)
+        Game.rng.seed(SEED)
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, time.perf_counter() - start)
+
+    return {"seconds_per_call": best / number, "calls": number}
+
+
+def run_benchmarks(names: list[str] = None, min_time: float = 0.2, repeat: int = 5) -> dict:
+    """Runs the named cases (all of them by default) and returns machine-readable results."""
+    names = names or list(CASES)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {name: time_case(CASES[name], min_time, repeat) for name in names},
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns a message for every case that is more than `threshold` (e.g. 0.2 for 20%) slower than the baseline."""
+    regressions = []
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds_per_call"]
+        after = result["seconds_per_call"]
+        if after > before * (1 + threshold):
+            regressions.append(f"{name}: {before * 1e6:.2f}us -> {after * 1e6:.2f}us ({after / before - 1:+.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the Camel Up engine hot paths.")
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (default: 0.25)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum seconds per timed batch")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for name in args.cases:
+        if name not in CASES:
+            parser.error(f"unknown case {name!r}")
+
+    results = run_benchmarks(args.cases, args.min_time, args.repeat)
+    print(json.dumps(results, indent=2))
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,77 @@
+"""
+Bounded cache of leg outcomes shared by every `Game` in the process.
+
+Keys are canonical board states: when the finish line is out of reach for
+the rest of the leg, the board is shifted back so the rear camel sits on
+square 0, which lets the same relative position at any point of the track
+hit the same entry.
+"""
+
+from collections import OrderedDict
+import threading
+import packed
+
+
+class LegCache:
+    """Least recently used cache mapping a canonical (board, remaining dice) key to its leg outcome tallies.
+    Safe to share between threads."""
+
+    def __init__(self, capacity: int = 4096):
+        """Creates an empty cache holding at most `capacity` entries."""
+        assert capacity > 0
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple):
+        """Returns the entry for `key`, or None if it is not cached."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry):
+        """Stores `entry` under `key`, evicting the least recently used entry if the cache is full."""
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def contains(self, key: tuple) -> bool:
+        """Returns whether `key` is cached, without touching the counters or the eviction order."""
+        with self.lock:
+            return key in self.entries
+
+    def stats(self) -> dict:
+        """Returns the hit and miss counters along with the current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "capacity": self.capacity}
+
+
+def canonical_key(
+    state: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int]
+) -> tuple:
+    """Returns the cache key for a packed board and its remaining dice bitmask.
+    Boards where no camel can reach the finish this leg are shifted so the rear camel is on square 0.
+    The number of camels is part of the key, since a camel on square 0 at the bottom of its stack packs to zero bits."""
+    num_dice = bin(remaining).count("1")
+    if packed.lead_square(state, num_camels) + max(faces) * num_dice < num_squares:
+        state = packed.shift_back(state, packed.rear_square(state, num_camels), num_camels)
+        return (state, remaining, faces, num_camels, None)
+    return (state, remaining, faces, num_camels, num_squares)
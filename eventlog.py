@@ -0,0 +1,205 @@
+"""
+Compact append-only binary log of game events.
+
+A log file is an 8-byte header followed by fixed-size 12-byte records, each
+packed as `<BBBBQ`: the event kind, three small fields and one 64-bit field.
+
+    START   a = number of players               value = packed starting board
+    RULES   a = number of squares, b = lowest face, c = highest face
+            value = the camel colors, 4 bits each from the lowest: 1 + index into `COLORS`
+    ROLL    a = camel index, b = distance, c = seat
+    BET     a = camel index, b = ticket value, c = seat
+    LEG     the leg was settled with finish_leg
+    END     the game is over
+
+Every START is followed by the RULES of its game, so variants replay under
+their own track, dice and camels. Camel indices follow the order of that
+game's `Game.camels`. Logs written before RULES existed replay under the
+standard rules.
+
+`EventWriter` buffers records and writes them in bulk. `EventReader`
+memory-maps a log and iterates the raw record tuples without building
+event objects, and can replay any game back into a `Game`.
+"""
+
+import mmap
+import os
+import struct
+from game import *
+
+MAGIC = b"CAMLOG01"
+RECORD = struct.Struct("<BBBBQ")
+
+START = 1
+ROLL = 2
+BET = 3
+LEG = 4
+END = 5
+RULES = 6
+
+COLORS = [*Color, *HouseColor]
+COLOR_BITS = 4
+
+
+class EventWriter:
+    """Appends events to a log file, writing them out in batches."""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        """Opens `path` for appending, writing the header if the file is new or empty.
+        Records are flushed once `buffer_size` bytes have built up."""
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.colors = None  # camel colors of the game being logged, in camel index order
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, kind: int, a: int = 0, b: int = 0, c: int = 0, value: int = 0):
+        self.buffer += RECORD.pack(kind, a, b, c, value)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def start(self, game: Game, num_players: int):
+        """Logs the start of a game from the current board of `game`, together with its rules."""
+        self.colors = [camel.color for camel in game.camels]
+        codes = 0
+        for i, color in enumerate(self.colors):
+            codes |= (COLORS.index(color) + 1) << (i * COLOR_BITS)
+        self.write(START, num_players, value=game.to_packed())
+        self.write(RULES, game.num_squares, game.faces[0], game.faces[-1], codes)
+
+    def roll(self, color: Color, distance: int, seat: int):
+        self.write(ROLL, self.camel_index(color), distance, seat)
+
+    def bet(self, ticket: BettingTicket, seat: int):
+        self.write(BET, self.camel_index(ticket.color), ticket.value, seat)
+
+    def camel_index(self, color: Color) -> int:
+        """Returns the index of a camel in the game being logged, which depends on that game's rules."""
+        if self.colors is None or color not in self.colors:
+            raise Exception(f"No camel of color {color.name} in the game being logged; log its start first.")
+        return self.colors.index(color)
+
+    def settle(self):
+        self.write(LEG)
+
+    def end(self):
+        self.write(END)
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def rules_of(num_squares: int, low: int, high: int, codes: int) -> dict:
+    """Returns the `Game` keyword arguments stored in a RULES record."""
+    colors = []
+    while codes:
+        colors.append(COLORS[(codes & ((1 << COLOR_BITS) - 1)) - 1])
+        codes >>= COLOR_BITS
+    return {"num_squares": num_squares, "dice_range": (low, high), "colors": colors}
+
+
+class EventReader:
+    """Reads a log file through a read-only memory map."""
+
+    def __init__(self, path: str):
+        self.map = None
+        self.view = None
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < len(MAGIC):
+            self.close()
+            raise Exception(f"{path} is not a Camel Up event log.")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise Exception(f"{path} is not a Camel Up event log.")
+        # ignore a partially written record at the end
+        end = len(MAGIC) + (size - len(MAGIC)) // RECORD.size * RECORD.size
+        self.view = memoryview(self.map)[len(MAGIC) : end]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.view) // RECORD.size
+
+    def records(self, start: int = 0):
+        """Iterates the raw (kind, a, b, c, value) tuples from record number `start` onwards."""
+        return RECORD.iter_unpack(self.view[start * RECORD.size :])
+
+    def kinds(self) -> bytes:
+        """Returns the kind byte of every record, extracted without unpacking the records."""
+        return self.view[:: RECORD.size].tobytes()
+
+    def count(self, kind: int) -> int:
+        """Returns how many records have the given kind."""
+        return self.kinds().count(bytes([kind]))
+
+    def game_starts(self) -> list[int]:
+        """Returns the record number at which each game starts."""
+        kinds = self.kinds()
+        starts = []
+        position = kinds.find(START)
+        while position != -1:
+            starts.append(position)
+            position = kinds.find(START, position + 1)
+        return starts
+
+    def replay(self, game_number: int) -> tuple[Game, list[Player]]:
+        """Rebuilds game number `game_number` (counting from 0) by replaying its events.
+        Returns the game and its players as they were after the last logged event."""
+        starts = self.game_starts()
+        if game_number >= len(starts):
+            raise Exception(f"The log only has {len(starts)} games.")
+
+        game = None
+        state = None
+        players = []
+        for kind, a, b, c, value in self.records(starts[game_number]):
+            if kind == START:
+                if state is not None:
+                    break
+                state = value
+                players = [Player(f"Player {i + 1}") for i in range(a)]
+                continue
+            if kind == RULES:
+                game = Game.from_packed(state, **rules_of(a, b, c, value))
+                continue
+            if game is None:
+                # logs from before RULES records go straight on to the moves
+                game = Game.from_packed(state)
+            if kind == ROLL:
+                game.make_roll(game.camels[a].color, b, players[c])
+            elif kind == BET:
+                game.make_bet(BettingTicket(game.camels[a].color, b), players[c])
+            elif kind == LEG:
+                game.finish_leg(players)
+            elif kind == END:
+                break
+        if game is None:
+            # the log ends right after the start of the game
+            game = Game.from_packed(state)
+        return game, players
+
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
@@ -1,45 +1,184 @@
+import math
+import random
+import time
 from enum import Enum
-from random import randint, choice
 from typing import Any
 from helper import *
 from player import *
+import packed
+import leg
+from cache import LegCache, canonical_key
+from rng import GameRandom
 from termcolor import colored
-import itertools
-from copy import deepcopy
 
 dice_range = [1, 3]
+TICKET_VALUES = (2, 2, 3, 5)  # each color's ticket stack, bottom to top
+TENT = {color: tuple(BettingTicket(color, value) for value in TICKET_VALUES) for color in [*Color, *HouseColor]}
+MAX_CAMELS = 1 << packed.HEIGHT_BITS  # a stack of every camel must fit the packed height field
+START_SQUARES = 3  # camels start the game spread over the first squares of the track
+
+
+class Undo:
+    """Record returned by `Game.make_roll` and `Game.make_bet` holding what `Game.unmake` needs to restore the prior state."""
+
+    def __init__(self, move_type: MoveType, player: Player = None):
+        self.move_type = move_type
+        self.player = player
+        # rolls
+        self.color = None
+        self.previous_result = 0
+        self.start_square = 0
+        self.final_square = 0
+        self.num_moved = 0
+        self.game_end = False
+        # bets
+        self.ticket = None
+
+
+class DiceStatus(dict):
+    """The result of every die by color, 0 while the die is still in the pyramid. Also keeps a bitmask of the dice
+    still in the pyramid up to date as results are set, so a roll can pick from `in_pyramid` without searching."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bits = {color: 1 << i for i, color in enumerate(self)}
+        self.mask = 0
+        for color, result in self.items():
+            if result == 0:
+                self.mask |= self.bits[color]
+        self.pyramids = {}  # mask -> colors in the pyramid, in dict order
+
+    def __setitem__(self, color, result):
+        dict.__setitem__(self, color, result)
+        try:
+            bit = self.bits[color]
+        except KeyError:
+            bit = self.bits[color] = 1 << len(self.bits)
+        if result == 0:
+            self.mask |= bit
+        else:
+            self.mask &= ~bit
+
+    def reset(self):
+        """Puts every die back in the pyramid."""
+        dict.update(self, dict.fromkeys(self, 0))
+        self.mask = (1 << len(self.bits)) - 1
+
+    @property
+    def in_pyramid(self) -> list:
+        """The colors of the dice still in the pyramid, in dict order. The list is shared, so it must not be modified."""
+        colors = self.pyramids.get(self.mask)
+        if colors is None:
+            colors = self.pyramids[self.mask] = [color for color, bit in self.bits.items() if self.mask & bit]
+        return colors
+
+    def __reduce__(self):
+        return (DiceStatus, (dict(self),))
+
+
+class Evaluation:
+    """Ticket EVs together with how they were worked out.
+    - EVs [dict] the EV of the top ticket of each color, like `Game.EV`
+    - method [str] "exact" for full enumeration, "sampled" for a Monte Carlo estimate
+    - error [float] half-width of the 95% confidence interval of every EV, 0 when exact
+    - outcomes [int] size of the outcome space of the rest of the leg
+    - samples [int] number of sampled legs, 0 when exact
+    """
+
+    def __init__(self, EVs: dict, method: str, error: float, outcomes: int, samples: int = 0):
+        self.EVs = EVs
+        self.method = method
+        self.error = error
+        self.outcomes = outcomes
+        self.samples = samples
+
+    def __repr__(self) -> str:
+        return f"Evaluation(method={self.method!r}, error={self.error:.4f}, outcomes={self.outcomes}, samples={self.samples})"
 
 
 class Game:
     """Main game class. Important attributes:
+    - num_squares [int] length of the track; a camel reaching the last square ends the game
+    - dice_range [tuple] lowest and highest face of every die
+    - faces [tuple] every face of a die, from `dice_range`
+    - colors [list] the colors in play, one camel and one die each; variants may add `HouseColor` camels, up to `MAX_CAMELS`
     - blocks [list] a mapping of the current board and camel positions
-    - available_dice [list] a list of color representing the available dice
-    - available_betting_tickets [list] a list of currently available betting tickets
+    - available_dice [DiceStatus] each die's result by color, 0 while it is in the pyramid; `in_pyramid` lists those
+    - tickets_left [dict] how many tickets of each color are left in the tent; the tickets themselves are the bottom of `TENT`
+    - positions [dict] an index of each camel's (square, height) on `blocks`, kept up to date by every move
+    - rng [GameRandom] where the starting board and the dice come from, shared by every game unless one is passed in
+    - sample_rng [Random] a stream of its own for sampled EVs, seeded from `rng`, so sampling never shifts the dice
+    - leg_cache [LegCache] leg outcomes shared by every game in the process, or None to always recompute
+    - rank_cache [LegCache] full rank tallies shared by every game in the process, or None to always recompute
+    - last_outcomes [tuple] the (packed board, remaining dice) of the last `leg_outcomes` call and its result
+    - leg_table [LegTable] precomputed leg outcomes looked up before the cache, or None (see `legtable.py`)
+    - ev_method [str] which leg engine EV uses: "recursive", "numpy", or "auto" to use NumPy when installed
+    - ev_workers [int] number of processes EV may split a leg across, 1 to stay in-process
+    - ev_parallel_threshold [int] minimum number of remaining dice before EV uses the process pool
+    - ev_time_budget [float] seconds EV may take; larger outcome spaces are sampled instead of enumerated
+    - ev_outcome_rate [float] outcomes per second the exact engines are assumed to enumerate
+    - ev_target_error [float] sampling stops once every EV is within this much at 95% confidence
     """
 
-    def __init__(self) -> None:
-        """Creates a Game object."""
+    rng = GameRandom()
+    leg_cache = LegCache()
+    rank_cache = LegCache(1024)
+    leg_table = None
+    ev_method = "auto"
+    ev_workers = 1
+    ev_parallel_threshold = 5
+    ev_time_budget = 0.5
+    ev_outcome_rate = 1e6
+    ev_target_error = 0.01
+
+    def __init__(
+        self, rng: GameRandom = None, num_squares: int = 16, dice_range: tuple[int] = tuple(dice_range), colors: list[Color] = None
+    ) -> None:
+        """Creates a Game object, drawing its randomness from `rng` if given.
+        House rules can change the track length, the die faces and which colors race, including the extra
+        `HouseColor` camels for variants with more than five."""
+        if rng is not None:
+            self.rng = rng
+        self.last_outcomes = None
         # initialize variables
-        self.num_squares = 16
+        # camels start on the first START_SQUARES squares, so the finish has to lie beyond them
+        if not START_SQUARES < num_squares <= packed.MAX_SQUARES:
+            raise Exception(f"The track needs between {START_SQUARES + 1} and {packed.MAX_SQUARES} squares.")
+        self.num_squares = num_squares
+        self.dice_range = tuple(dice_range)
+        # 0 marks a die still in the pyramid in `available_dice`, so no face can show it
+        if len(self.dice_range) != 2 or not 1 <= self.dice_range[0] <= self.dice_range[1]:
+            raise Exception(f"The dice range must be (lowest, highest) with 1 <= lowest <= highest, got {dice_range}.")
+        self.faces = tuple(range(self.dice_range[0], self.dice_range[1] + 1))
+        self.colors = list(colors or Color)
+        if not 2 <= len(self.colors) <= MAX_CAMELS or len(set(self.colors)) != len(self.colors):
+            raise Exception(f"A game needs between 2 and {MAX_CAMELS} different camels.")
         self.blocks = [[] for _ in range(self.num_squares)]
-        self.camels = [Camel(color) for color in Color]
-        self.available_dice = {color: 0 for color in Color}
+        self.camels = [Camel(color) for color in self.colors]
+        self.camels_by_color = {camel.color: camel for camel in self.camels}
+        self.camel_indices = {camel.color: i for i, camel in enumerate(self.camels)}
+        self.available_dice = {color: 0 for color in self.colors}
 
         # move each camel to a random starting position
         for camel in self.camels:
-            starting_position = randint(1, 3) - 1
+            starting_position = self.rng.randint(1, START_SQUARES) - 1
             self.blocks[starting_position].append(camel)
+        self.reindex()
+        # sampling stops on a deadline, so it takes however many draws fit and must not share the dice stream
+        self.sample_rng = random.Random(self.rng.getrandbits(64))
 
         # create our betting tokens
-        self.available_betting_tickets = {
-            color: [
-                BettingTicket(color, 2),
-                BettingTicket(color, 2),
-                BettingTicket(color, 3),
-                BettingTicket(color, 5),
-            ]
-            for color in Color
-        }
+        self.reset_tent()
+
+    @property
+    def available_dice(self) -> DiceStatus:
+        """Each die's result by color, 0 while it is still in the pyramid."""
+        return self.dice
+
+    @available_dice.setter
+    def available_dice(self, dice: dict):
+        """Dice assigned as a plain dict are wrapped, so the pyramid is tracked however the dice are set."""
+        self.dice = dice if isinstance(dice, DiceStatus) else DiceStatus(dice)
 
     def is_valid_move(self, move: tuple[MoveType, Any]) -> bool:
         """Returns whether a move is valid, e.g. betting or rolling"""
@@ -47,45 +186,53 @@ class Game:
         if (
             move_type == MoveType.token
             and move[1] == None
-            and len(self.dice_status()[1]) > 0
+            and self.available_dice.mask
         ):
             return True
         elif move_type == MoveType.bet:
-            desired_ticket = move[1]
-            for betting_ticket in self.available_betting_tickets[desired_ticket.color]:
-                if desired_ticket.value == betting_ticket.value:
-                    return True
+            return self.is_top_ticket(move[1])
 
         return False
 
+    def reset_tent(self):
+        """Puts every betting ticket back in the tent."""
+        self.tickets_left = {color: len(TICKET_VALUES) for color in self.colors}
+        self.top_tickets = None
+
+    @property
+    def available_betting_tickets(self) -> dict:
+        """The tickets left in the tent as a list per color, top ticket last."""
+        return {color: list(TENT[color][:left]) for color, left in self.tickets_left.items()}
+
+    def is_top_ticket(self, ticket: BettingTicket) -> bool:
+        """Returns whether `ticket` is the top ticket of its color, the only one that can be taken."""
+        left = self.tickets_left[ticket.color]
+        return left > 0 and TENT[ticket.color][left - 1] == ticket
+
     def remove_ticket(self, ticket: BettingTicket) -> BettingTicket:
         """Removes a ticket from the currently available tickets. Returns the ticket if successful."""
-        for i, betting_ticket in enumerate(
-            self.available_betting_tickets[ticket.color]
-        ):
-            if ticket.value == betting_ticket.value:
-                return self.available_betting_tickets[ticket.color].pop(i)
-
-        raise Exception(
-            "Desired betting ticket not found in available betting tickets."
-        )
+        if not self.is_top_ticket(ticket):
+            raise Exception(
+                "Desired betting ticket not found in available betting tickets."
+            )
+        self.tickets_left[ticket.color] -= 1
+        self.top_tickets = None
+        return ticket
 
     def ticket_status(self) -> dict:
-        """Returns a list of the highest available betting tickets for each color, i.e. the information displayed at the ticket tent."""
-        max_tickets = {}
-        for color in self.available_betting_tickets:
-            tickets = self.available_betting_tickets[color]
-            if len(tickets) > 0:
-                max_tickets[color] = tickets[-1]
+        """Returns a list of the highest available betting tickets for each color, i.e. the information displayed at the ticket tent.
+        The dict is shared until the tent changes, so it must not be modified."""
+        if self.top_tickets is None:
+            self.top_tickets = {color: TENT[color][left - 1] for color, left in self.tickets_left.items() if left > 0}
+        return self.top_tickets
 
-        return max_tickets
+    def random_roll(self) -> tuple[Color, int]:
+        """Picks a random die from the pyramid and a result for it as (Color, distance), without using the die up."""
+        return self.rng.roll(self.available_dice.in_pyramid, *self.dice_range)
 
     def generate_random_roll(self) -> tuple[Color, int]:
         """Returns a random dice roll as (Color, distance)."""
-        color = choice(
-            [color for color, result in self.available_dice.items() if result == 0]
-        )
-        roll = randint(*dice_range)
+        color, roll = self.random_roll()
         self.available_dice[color] = roll
         return (color, roll)
 
@@ -103,35 +250,41 @@ class Game:
 
     def get_camel(self, color: Color) -> Camel:
         """Returns the camel matching a given color."""
-        for camel in self.camels:
-            if camel.color == color:
-                return camel
-        return None
+        return self.camels_by_color.get(color)
+
+    def reindex(self):
+        """Rebuilds `positions` from `blocks`. Needed only after `blocks` is edited directly; `locate` does it automatically."""
+        self.positions = {}
+        for square, block in enumerate(self.blocks):
+            for height, camel in enumerate(block):
+                self.positions[camel.color] = (square, height)
+
+    def locate(self, color: Color) -> tuple[int, int]:
+        """Returns the (square, height) of the camel of a given color, or None if it is not on the board.
+        The index entry is checked against `blocks` so edits made directly to the board are picked up."""
+        position = self.positions.get(color)
+        if position is not None:
+            try:
+                if self.blocks[position[0]][position[1]].color is color:
+                    return position
+            except IndexError:
+                pass
+        self.reindex()
+        return self.positions.get(color)
 
     def move_camel(self, camel: Camel, distance: int) -> int:
         """Takes a camel and moves it from its current position in `self.blocks` to that position + `distance`.
         Must consider the stacked ordering. Will move camels above the current one. Returns the final position of the camel stack."""
-        # initialize variables
-        current_position = 0
-        camels_to_move = [camel]
-
-        # check for the camel in the current board
-        for i, block in enumerate(self.blocks):
-            if camel in block:
-                current_position = i
-                current_order = block  # order as in ordering of the camels
-
-                stack_position = current_order.index(
-                    camel
-                )  # find the position of our camel in the stack
-                if stack_position < len(current_order) - 1:
-                    camels_to_move = current_order[
-                        stack_position:
-                    ]  # get a list of our camel and all above it
-                # print(f"{stack_position = }, {camels_to_move = }, {current_order = }, {current_position = }")
-                [
-                    current_order.remove(camel) for camel in camels_to_move
-                ]  # remove everything from the current position
+        position = self.locate(camel.color)
+        if position is None:
+            # camels not on the board yet start from the first square
+            current_position = 0
+            camels_to_move = [camel]
+        else:
+            current_position, height = position
+            current_order = self.blocks[current_position]
+            camels_to_move = current_order[height:]  # our camel and all above it
+            del current_order[height:]
 
         # move camels to ending position
         final_position = current_position + distance
@@ -141,8 +294,10 @@ class Game:
             final_position = self.num_squares - 1
             game_end = True
 
-        for camel in camels_to_move:
-            self.blocks[final_position].append(camel)
+        final_order = self.blocks[final_position]
+        for height, camel in enumerate(camels_to_move, len(final_order)):
+            self.positions[camel.color] = (final_position, height)
+        final_order += camels_to_move
         return (final_position, game_end)
 
     def give_coin(self, players: list[Player]):
@@ -154,7 +309,14 @@ class Game:
     def get_winning_camels(self, blocks=None) -> tuple[Camel, Camel]:
         """Returns a ordered tuple of the top two camels. If no `blocks` is passed in, evaluates self. If `blocks` is passedd, evaluates that game state."""
         if blocks is None:
-            blocks = self.blocks
+            # the leaders are the two camels with the highest (square, height)
+            first = second = (-1, -1)
+            for position in self.indexed_positions().values():
+                if position > first:
+                    first, second = position, first
+                elif position > second:
+                    second = position
+            return self.blocks[first[0]][first[1]], self.blocks[second[0]][second[1]]
         # evaluate the status of each camel
         camel_ordering = []
         for block in blocks:
@@ -164,6 +326,11 @@ class Game:
 
         return camel_ordering[-1], camel_ordering[-2]
 
+    def get_ranking(self) -> list[Camel]:
+        """Returns every camel ordered by race position, leader first."""
+        positions = self.indexed_positions()
+        return sorted(self.camels, key=lambda camel: positions[camel.color], reverse=True)
+
     def give_betting(self, players: list[Player]):
         """At the end of the leg, distributes betting coins to the players based on the current game state."""
         winning_camel, second_camel = self.get_winning_camels() 
@@ -189,64 +356,305 @@ class Game:
             player.token = 0
 
         # reset dice
-        self.available_dice = {color: 0 for color in Color}
+        self.available_dice.reset()
 
         # reset available betting tickets
-        self.available_betting_tickets = {
-            color: [
-                BettingTicket(color, 2),
-                BettingTicket(color, 2),
-                BettingTicket(color, 3),
-                BettingTicket(color, 5),
-            ]
-            for color in Color
-        }
+        self.reset_tent()
 
     def is_finished_leg(self) -> bool:
         """Returns whether the leg has finished."""
-        if len(self.dice_status()[1]) == 0:
-            return True
-
-        return False
+        return not self.available_dice.mask
     
+    def indexed_positions(self) -> dict:
+        """Returns `positions` after checking every entry against `blocks`, rebuilding it if any is stale."""
+        blocks = self.blocks
+        try:
+            for color, (square, height) in self.positions.items():
+                if blocks[square][height].color is not color:
+                    raise IndexError
+        except IndexError:
+            self.reindex()
+            return self.positions
+        if len(self.positions) < len(self.camels):
+            self.reindex()
+        return self.positions
+
+    def to_packed(self) -> int:
+        """Returns the current board encoded as a packed int (see `packed.py`)."""
+        state = 0
+        for color, (square, height) in self.indexed_positions().items():
+            field = (square << packed.HEIGHT_BITS) | height
+            state |= field << (self.camel_indices[color] * packed.CAMEL_BITS)
+        return state
+
+    def load_packed(self, state: int):
+        """Replaces the current board with the one encoded in the packed int `state`."""
+        self.blocks = packed.unpack(state, self.camels, self.num_squares)
+        self.reindex()
+
+    @classmethod
+    def from_packed(cls, state: int, **rules) -> "Game":
+        """Creates a Game whose board is the one encoded in the packed int `state`, with any house `rules` of `Game`."""
+        game = cls(**rules)
+        game.load_packed(state)
+        return game
+
+    def camel_index(self, color: Color) -> int:
+        """Returns the index of the camel of a given color in the packed encoding."""
+        if color not in self.camel_indices:
+            raise Exception(f"No camel of color {color.name} in this game.")
+        return self.camel_indices[color]
+
     def expected_winner(self, board: list[list[Camel]], dice_rolls: tuple[int], color_permutation: tuple[Color]) -> tuple[Camel, Camel]:
         """Takes a starting board state, a list of dice rolls, and the color order of the dice. Returns the top two camels."""
-        # print(f"dice roll: {len(dice_rolls)}")
-        # print(f"color permuation: {len(color_permutation)}")
         assert len(dice_rolls) == len(color_permutation)
-        new_game = Game() 
-        new_game.blocks = deepcopy(board)
-        for i in range(len(color_permutation)):
-            new_game.move_camel(Camel(color_permutation[i]), dice_rolls[i])
+        num_camels = len(self.camels)
+        state = packed.pack(board, self.camels)
+        for color, roll in zip(color_permutation, dice_rolls):
+            state, _, _ = packed.move(
+                state, self.camel_index(color), roll, self.num_squares, num_camels
+            )
+
+        first, second = packed.winners(state, num_camels)
+        return self.camels[first], self.camels[second]
+
+    # *** MAKE / UNMAKE ***
+
+    def make_roll(self, color: Color, distance: int, player: Player = None) -> Undo:
+        """Applies a roll of the die of a given color in place, giving `player` (if any) a pyramid token.
+        Returns an Undo record; `undo.final_square` and `undo.game_end` report where the stack landed."""
+        undo = Undo(MoveType.token, player)
+        undo.color = color
+        undo.previous_result = self.available_dice[color]
+        undo.start_square, height = self.locate(color)
+        undo.num_moved = len(self.blocks[undo.start_square]) - height
+
+        self.available_dice[color] = distance
+        undo.final_square, undo.game_end = self.move_camel(self.get_camel(color), distance)
+        if player is not None:
+            player.add_tokens(1)
+        return undo
+
+    def make_bet(self, ticket: BettingTicket, player: Player = None) -> Undo:
+        """Takes a betting ticket from the tent in place, handing it to `player` (if any). Returns an Undo record."""
+        undo = Undo(MoveType.bet, player)
+        undo.ticket = self.remove_ticket(ticket)
+
+        if player is not None:
+            player.add_betting_cards(undo.ticket)
+        return undo
+
+    def unmake(self, undo: Undo):
+        """Restores the state from before the move recorded in `undo`. Moves must be unmade in reverse order."""
+        if undo.move_type == MoveType.bet:
+            self.tickets_left[undo.ticket.color] += 1
+            self.top_tickets = None
+            if undo.player is not None:
+                undo.player.betting_cards.pop()
+            return
+
+        # lift the stack back off the destination square
+        final_order = self.blocks[undo.final_square]
+        camels_to_move = final_order[len(final_order) - undo.num_moved:]
+        del final_order[len(final_order) - undo.num_moved:]
+        start_order = self.blocks[undo.start_square]
+        for height, camel in enumerate(camels_to_move, len(start_order)):
+            self.positions[camel.color] = (undo.start_square, height)
+        start_order += camels_to_move
+
+        self.available_dice[undo.color] = undo.previous_result
+        if undo.player is not None:
+            undo.player.token -= 1
 
-        return new_game.get_winning_camels()
-        
     # *** EXPECTED VALUE CODE ***
 
-    def EV(self) -> list[tuple]:
-        """Returns a list of all possible dice combinations"""
-        _, available_dice = self.dice_status()
-        available_dice = [x[0] for x in available_dice]
-        color_permutation = list(itertools.permutations(available_dice))
-        dice_product = [(1,), (2,), (3,)]
-        for i in range(len(available_dice) - 1):
-            dice_product = list(itertools.product([1, 2, 3], dice_product))
-            for j, tup in enumerate(dice_product):
-                tup = [tup[0]] + list(tup[1])
-                dice_product[j] = tuple(tup)
-        first_place = {color:0 for color in Color}
-        second_place = {color:0 for color in Color}
-        for color in color_permutation:
-            for dice_roll in dice_product:
-                first_place_camel, second_place_camel = self.expected_winner(self.blocks, dice_roll, color)
-                first_place[first_place_camel.get_color()] += 1
-                second_place[second_place_camel.get_color()] += 1
-        combos = (len(color_permutation) * len(dice_product))
+    def remaining_dice(self) -> int:
+        """Returns a bitmask of the camel indices whose dice are still in the pyramid."""
+        remaining = 0
+        for color in self.available_dice.in_pyramid:
+            remaining |= 1 << self.camel_indices[color]
+        return remaining
+
+    def packed_leg_outcomes(self, state: int, remaining: int) -> tuple[tuple, tuple, int]:
+        """Returns the leg outcome tallies of a packed board and remaining dice bitmask, indexed by camel,
+        going through `leg_table`, `leg_cache` and `rank_cache` when they are set."""
+        key, entry = self.cached_leg_outcomes(state, remaining)
+        if entry is None:
+            entry = self.store_rank_tallies(
+                key,
+                self.rank_tallies(key, self.num_squares, self.ev_method, self.ev_workers, self.ev_parallel_threshold),
+            )
+        return entry
+
+    def cached_leg_outcomes(self, state: int, remaining: int) -> tuple[tuple, tuple]:
+        """Returns the cache key of a packed board and remaining dice bitmask, and its leg outcome tallies if
+        `leg_table`, `leg_cache` or `rank_cache` already has them, or None if they have to be enumerated."""
+        faces = self.faces
+        num_camels = len(self.camels)
+        key = canonical_key(state, remaining, self.num_squares, num_camels, faces)
+
+        if self.leg_table is not None:
+            entry = self.leg_table.lookup(state, remaining, self.num_squares, num_camels, faces)
+            if entry is not None:
+                return key, entry
+
+        if self.leg_cache is not None:
+            entry = self.leg_cache.get(key)
+            if entry is not None:
+                return key, entry
+
+        # the rank tallies hold first and second place too, so reuse them when rank probabilities were asked for before
+        ranked = self.rank_cache.get(key) if self.rank_cache is not None else None
+        if ranked is not None:
+            return key, self.store_rank_tallies(key, ranked)
+        return key, None
+
+    @staticmethod
+    def rank_tallies(key: tuple, num_squares: int, method: str = "auto", workers: int = 1, threshold: int = 5) -> tuple:
+        """Enumerates the rank tallies of the canonical board of cache `key` without going through any cache.
+        This is the slow part, so callers may run it in an executor and file the result with `store_rank_tallies`."""
+        state, remaining, faces, num_camels, _ = key
+        ranks, squares, combos = leg.leg_ranks_parallel(
+            state, remaining, num_squares, num_camels, faces, workers, threshold, method
+        )
+        return tuple(tuple(r) for r in ranks), tuple(squares), combos
+
+    def store_rank_tallies(self, key: tuple, ranked: tuple) -> tuple[tuple, tuple, int]:
+        """Puts the rank tallies of cache `key` in the caches and returns its leg outcome tallies:
+        first and second place are the first two ranks, so one enumeration serves both EV and `rank_probabilities`."""
+        ranks, _, combos = ranked
+        entry = (tuple(r[0] for r in ranks), tuple(r[1] for r in ranks), combos)
+        if self.rank_cache is not None:
+            self.rank_cache.put(key, ranked)
+        if self.leg_cache is not None:
+            self.leg_cache.put(key, entry)
+        return entry
+
+    def leg_outcomes(self) -> tuple[dict, dict, int]:
+        """Enumerates every way the rest of the leg can play out. Returns how many outcomes finish with each color
+        in first and in second place, and the total number of outcomes.
+        Taking tickets does not change the outcomes, so they are kept until the board or the dice change."""
+        signature = (self.to_packed(), self.remaining_dice())
+        if self.last_outcomes is not None and self.last_outcomes[0] == signature:
+            return self.last_outcomes[1]
+        outcomes = self.by_color(*self.packed_leg_outcomes(*signature))
+        self.last_outcomes = (signature, outcomes)
+        return outcomes
+
+    def canonical_rank_outcomes(self, key: tuple) -> tuple[tuple, tuple, int]:
+        """Returns the rank tallies of the canonical board of cache `key`, going through `rank_cache` when it is set."""
+        entry = self.rank_cache.get(key) if self.rank_cache is not None else None
+        if entry is None:
+            entry = self.rank_tallies(key, self.num_squares, self.ev_method, self.ev_workers, self.ev_parallel_threshold)
+            if self.rank_cache is not None:
+                self.rank_cache.put(key, entry)
+        return entry
+
+    def packed_rank_outcomes(self, state: int, remaining: int) -> tuple[tuple, tuple, int]:
+        """Returns the rank tallies of `leg.leg_ranks` for a packed board and remaining dice bitmask, indexed by camel,
+        going through `rank_cache` when it is enabled."""
+        key = canonical_key(state, remaining, self.num_squares, len(self.camels), self.faces)
+        ranks, squares, combos = self.canonical_rank_outcomes(key)
+
+        # canonical boards are shifted back to square 0, so shift the square sums forward again
+        offset = packed.rear_square(state, len(self.camels)) - packed.rear_square(key[0], len(self.camels))
+        return ranks, tuple(total + offset * combos for total in squares), combos
+
+    def rank_probabilities(self) -> tuple[dict, dict]:
+        """Returns, for each color, the probability of it finishing the leg in each rank (index 0 is first place),
+        and its expected square (an index into `blocks`) at the end of the leg."""
+        ranks, squares, combos = self.packed_rank_outcomes(self.to_packed(), self.remaining_dice())
+        probabilities = {camel.color: [count / combos for count in ranks[i]] for i, camel in enumerate(self.camels)}
+        expected_squares = {camel.color: squares[i] / combos for i, camel in enumerate(self.camels)}
+        return probabilities, expected_squares
+
+    def by_color(self, first: tuple, second: tuple, combos: int) -> tuple[dict, dict, int]:
+        """Converts leg outcome tallies indexed by camel into tallies keyed by color."""
+        first_place = {camel.color: first[i] for i, camel in enumerate(self.camels)}
+        second_place = {camel.color: second[i] for i, camel in enumerate(self.camels)}
+        return first_place, second_place, combos
+
+    def EV(self) -> dict:
+        """Returns the expected value of taking the top available betting ticket of each color.
+        After a ticket take this only reprices the tickets, reusing the outcomes of `leg_outcomes`."""
+        return self.evaluate().EVs
+
+    def evaluate(self, time_budget: float = None, target_error: float = None, method: str = "auto") -> Evaluation:
+        """Works out the ticket EVs exactly, or estimates them by sampling legs when enumerating every outcome
+        would not fit in `time_budget` seconds (`ev_time_budget` by default). `method` can force "exact" or "sampled".
+        Sampling stops once every EV is within `target_error` (`ev_target_error` by default) or the time is up."""
+        time_budget = self.ev_time_budget if time_budget is None else time_budget
+        state = self.to_packed()
+        remaining = self.remaining_dice()
+        method, outcomes = self.evaluation_method(state, remaining, time_budget, method)
+        if method == "exact":
+            return Evaluation(self.price_tickets(*self.leg_outcomes()), "exact", 0.0, outcomes)
+        return self.sample_evaluation(state, remaining, self.ticket_status(), time_budget, target_error)
+
+    def outcome_space(self, remaining: int) -> int:
+        """Returns how many equally likely ways the leg can play out with the dice of bitmask `remaining` left."""
+        num_dice = bin(remaining).count("1")
+        return math.factorial(num_dice) * len(self.faces) ** num_dice
+
+    def evaluation_method(self, state: int, remaining: int, time_budget: float, method: str = "auto") -> tuple[str, int]:
+        """Returns how `evaluate` works out the EVs of a packed board and remaining dice bitmask, "exact" or "sampled",
+        and the size of its outcome space. Outcomes that are already known are always used."""
+        outcomes = self.outcome_space(remaining)
+        if method == "auto":
+            known = self.last_outcomes is not None and self.last_outcomes[0] == (state, remaining)
+            method = "exact" if known or outcomes <= self.ev_outcome_rate * time_budget else "sampled"
+        if method not in ("exact", "sampled"):
+            raise Exception(f"Unknown EV method {method!r}, expected 'auto', 'exact' or 'sampled'.")
+        return method, outcomes
+
+    def sample_evaluation(
+        self, state: int, remaining: int, tickets: dict, time_budget: float = None, target_error: float = None
+    ) -> Evaluation:
+        """Estimates the EVs of `tickets` (color -> top ticket) on a packed board and remaining dice bitmask by
+        sampling legs from `sample_rng`, until every EV is within `target_error` or `time_budget` runs out."""
+        time_budget = self.ev_time_budget if time_budget is None else time_budget
+        target_error = self.ev_target_error if target_error is None else target_error
+        outcomes = self.outcome_space(remaining)
+        num_camels = len(self.camels)
+        first = [0] * num_camels
+        second = [0] * num_camels
+        samples = 0
+        deadline = time.perf_counter() + time_budget
+        while True:
+            batch_first, batch_second, batch = leg.sample_leg_outcomes(
+                state, remaining, self.num_squares, num_camels, self.faces, 500, self.sample_rng
+            )
+            for i in range(num_camels):
+                first[i] += batch_first[i]
+                second[i] += batch_second[i]
+            samples += batch
+
+            # each ticket pays its value, 1 or -1 per sampled leg, so its EV is a mean with a normal-approximation error
+            error = 0.0
+            for i, camel in enumerate(self.camels):
+                if camel.color not in tickets:
+                    continue
+                value = tickets[camel.color].get_value()
+                p_first = first[i] / samples
+                p_second = second[i] / samples
+                mean = p_first * value + p_second - (1 - p_first - p_second)
+                square = p_first * value * value + (1 - p_first)
+                error = max(error, 1.96 * math.sqrt(max(square - mean * mean, 0) / samples))
+            if error <= target_error or time.perf_counter() >= deadline:
+                break
+
+        EVs = self.price_tickets(*self.by_color(first, second, samples), tickets)
+        return Evaluation(EVs, "sampled", error, outcomes, samples)
+
+    def price_tickets(self, first_place: dict, second_place: dict, combos: int, tickets: dict = None) -> dict:
+        """Returns the EV of the top available ticket of each color, given leg outcome tallies keyed by color.
+        Prices `tickets` (color -> top ticket) instead of the current tent if given."""
+        tickets = tickets if tickets is not None else self.ticket_status()
         return {color: 
-                 first_place[color] / combos * self.ticket_status()[color].get_value() + 
+                 first_place[color] / combos * tickets[color].get_value() + 
                  second_place[color] / combos  - 
                  (combos - first_place[color] - second_place[color]) / combos
-                 for color in Color if color in self.ticket_status()}
+                 for color in self.colors if color in tickets}
 
 if __name__ == "__main__":
     manager = Game()
@@ -6,53 +6,110 @@ from enum import Enum
 from termcolor import colored
 
 
-class Color(Enum):
+class CamelColor(Enum):
+    """Base of the camel color enums. Each value is the termcolor color the camel is drawn in."""
+
+    def __str__(self) -> str:
+        return colored(self.name, self.value.lower())
+
+    def colorize(self, string) -> str:
+        return colored(string, self.value.lower())
+
+
+class Color(CamelColor):
     red = "RED"
     green = "GREEN"
     blue = "BLUE"
     yellow = "YELLOW"
     purple = "MAGENTA"
 
-    def __str__(self) -> str:
-        return colored(self.name, self.value.lower())
 
-    def colorize(self, string) -> str:
-        return colored(string, self.value.lower())
+class HouseColor(CamelColor):
+    """Extra camels for house variants with more than the five standard camels (see `Game`)."""
+
+    white = "WHITE"
+    cyan = "CYAN"
+    black = "BLACK"
 
 
 class Camel:
-    def __init__(self, color) -> None:
-        self.color = color
+    """A camel piece. There is exactly one Camel per color: `Camel(color)` always returns the same immutable object."""
+
+    __slots__ = ("color", "text")
+    instances = {}
+
+    def __new__(cls, color):
+        camel = cls.instances.get(color)
+        if camel is None:
+            camel = object.__new__(cls)
+            object.__setattr__(camel, "color", color)
+            object.__setattr__(camel, "text", None)
+            cls.instances[color] = camel
+        return camel
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Camels are immutable.")
+
+    def __reduce__(self):
+        return (Camel, (self.color,))
 
     def __repr__(self) -> str:
-        return colored(self.color.name[0].upper(), self.color.value.lower())
+        # the colored letter is built on first use and kept
+        if self.text is None:
+            object.__setattr__(self, "text", colored(self.color.name[0].upper(), self.color.value.lower()))
+        return self.text
 
     def __str__(self) -> str:
-        return colored(self.color.name[0].upper(), self.color.value.lower())
+        return repr(self)
 
     def __eq__(self, other_camel):
         if isinstance(other_camel, Camel):
             return self.color == other_camel.color
         return False
-    
+
+    def __hash__(self):
+        return hash(self.color)
+
     def get_color(self):
         return self.color
 
 
 class BettingTicket:
-    def __init__(self, color: Color, price: int):
-        assert price in [2, 3, 5]
-        self.color = color
-        self.value = price
+    """A betting ticket. There is exactly one BettingTicket per (color, value): constructing it again returns the same immutable object."""
+
+    __slots__ = ("color", "value", "text")
+    instances = {}
+
+    def __new__(cls, color: Color, price: int):
+        ticket = cls.instances.get((color, price))
+        if ticket is None:
+            assert price in [2, 3, 5]
+            ticket = object.__new__(cls)
+            object.__setattr__(ticket, "color", color)
+            object.__setattr__(ticket, "value", price)
+            object.__setattr__(ticket, "text", None)
+            cls.instances[(color, price)] = ticket
+        return ticket
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Betting tickets are immutable.")
+
+    def __reduce__(self):
+        return (BettingTicket, (self.color, self.value))
 
     def __repr__(self) -> str:
-        return colored(self.value, self.color.value.lower())
+        if self.text is None:
+            object.__setattr__(self, "text", colored(self.value, self.color.value.lower()))
+        return self.text
 
     def __eq__(self, other_ticket) -> bool:
         if isinstance(other_ticket, BettingTicket):
             return (self.color == other_ticket.color) and (self.value == other_ticket.value)
         return False
-    
+
+    def __hash__(self):
+        return hash((self.color, self.value))
+
     def get_value(self):
         return self.value
 
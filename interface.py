@@ -1,7 +1,9 @@
+import shutil
 from game import *
 from player import *
+from precompute import Precomputer
+from renderer import Renderer
 from colorama import *
-import os
 
 
 class Interface:
@@ -10,36 +12,45 @@ class Interface:
         self.game = game_manager
         self.player_1 = player_1
         self.player_2 = player_2
-        self.main_loop()
+        self.precomputer = Precomputer()
+        self.renderer = Renderer()
+        init()
+        try:
+            self.main_loop()
+        finally:
+            self.precomputer.shutdown()
 
     def clear(self):
         """Clears the current display."""
-        if os.name == "nt":
-            _ = os.system("cls")
-        else:
-            _ = os.system("clear")
+        self.renderer.clear()
 
     def main_loop(self):
         """The game run loop."""
         self.clear()
-        current_player = player_1
+        current_player = self.player_1
+        messages = []
         while True:
             # finish leg if needed
             if self.game.is_finished_leg():
-                self.game.finish_leg([player_1, player_2])
-                print("************")
-                print("The leg has finished.")
-                print("************")
+                self.game.finish_leg([self.player_1, self.player_2])
                 winner, second = self.game.get_winning_camels()
-                print(f"The winner of the leg is {winner}, and second place is {second}!")
-                print(
-                    f"{player_1} has {player_1.coins} coins, and {player_2} has {player_2.coins} coins."
-                )
+                messages += [
+                    "************",
+                    "The leg has finished.",
+                    "************",
+                    f"The winner of the leg is {winner}, and second place is {second}!",
+                    f"{self.player_1} has {self.player_1.coins} coins, and {self.player_2} has {self.player_2.coins} coins.",
+                ]
+
+            self.display(messages)
 
-            self.display()
+            # work out the next EVs while the player is deciding
+            self.precomputer.start(self.game)
 
             # get users action
             action = self.get_player_input(current_player)
+            # the move is known, so whatever is still queued for the other moves is wasted work
+            self.precomputer.cancel()
             output_message = ""
             match action[0]:
                 case MoveType.bet:
@@ -62,67 +73,78 @@ class Interface:
                         break
                     output_message = f"***\n{Camel(color)} has moved by {result}\n***"
 
-            self.clear()
-            print(output_message)
+            messages = output_message.split("\n")
 
             # alternate players
-            if current_player == player_1:
-                current_player = player_2
+            if current_player == self.player_1:
+                current_player = self.player_2
             else:
-                current_player = player_1
+                current_player = self.player_1
 
         print("*********\nThank you for playing Camel Up!\n*********")
 
-    def display(self):
-        """Displays the current game state"""
-        init()
-
-        # print tickets
-        print("--- Ticket Tent ---")
-        print(f"Available Tickets: {list(self.game.ticket_status().values())}")
-        print("\n")
-
-        # print EV
-        print("--- EV ---")
+    def display(self, messages: list[str] = None):
+        """Displays the current game state, below any `messages` about the last move"""
+        reserve = 8
+        lines = self.frame(messages)
+        if len(lines) + reserve >= shutil.get_terminal_size().lines:
+            # leave the incremental redraw room to work on small terminals
+            lines = self.frame(messages, compact=True)
+        self.renderer.draw(lines, reserve=reserve)
+
+    def frame(self, messages: list[str] = None, compact: bool = False) -> list[str]:
+        """Returns the lines of the game state display. A `compact` board folds runs of empty squares into one line."""
+        renderer = self.renderer
+        lines = list(messages or [])
+
+        # tickets
+        lines.append("--- Ticket Tent ---")
+        tickets = ", ".join(renderer.ticket(ticket) for ticket in self.game.ticket_status().values())
+        lines.append(f"Available Tickets: [{tickets}]")
+        lines += ["", ""]
+
+        # EV
+        lines.append("--- EV ---")
         EVs = self.game.EV()
         for ev in EVs:
-            print(f"{ev}: {round(EVs[ev], 2)}")
-        print(f"rolling: 1")
-        print("\n")
+            lines.append(f"{ev}: {round(EVs[ev], 2)}")
+        lines.append(f"rolling: 1")
+        lines += ["", ""]
 
-        # print dice
-        print("--- Dice ---")
+        # dice
+        lines.append("--- Dice ---")
         used_dice, available_dice = self.game.dice_status()
-
-        used_dice_output = ""
-        for color, result in used_dice:
-            used_dice_output += colored(result, "white", f"on_{color.value.lower()}")
-
-        available_dice_output = ""
-        for color, result in available_dice:
-            available_dice_output += colored(
-                "   ", "white", f"on_{color.value.lower()}"
+        used_dice_output = "".join(renderer.die(color, result) for color, result in used_dice)
+        available_dice_output = "".join(renderer.die(color, result) for color, result in available_dice)
+        lines.append(f"Used Dice: {used_dice_output}")
+        lines.append(f"Available Dice: {available_dice_output}")
+        lines += ["", ""]
+
+        # current board state
+        lines.append("--- Board ---")
+        lines.append(f"The current board is:")
+        i = 0
+        while i < len(self.game.blocks):
+            camels = self.game.blocks[i]
+            end = i + 1
+            if compact and not camels:
+                while end < len(self.game.blocks) and not self.game.blocks[end]:
+                    end += 1
+            if end - i > 1:
+                lines.append(f"{i+1:02}-{end:02}: []")
+            else:
+                lines.append(f"{i+1:02}: {renderer.stack(camels)}")
+            i = end
+        lines += ["", ""]
+
+        lines.append("--- Player Status ---")
+        for player in [self.player_1, self.player_2]:
+            cards = ", ".join(renderer.ticket(ticket) for ticket in player.get_betting_cards())
+            lines.append(
+                f"{player} has [{cards}] betting cards and {player.get_tokens()} pyramid tokens"
             )
-
-        print(f"Used Dice: {used_dice_output}")
-        print(f"Available Dice: {available_dice_output}")
-        print("\n")
-
-        # print current board state
-        print("--- Board ---")
-        print(f"The current board is:")
-        for i, camels in enumerate(self.game.blocks):
-            print(f"{i+1:02}: {camels}")
-        print("\n")
-
-        print("--- Player Status ---")
-        print(
-            f"{player_1} has {player_1.get_betting_cards()} betting cards and {player_1.get_tokens()} pyramid tokens"
-        )
-        print(
-            f"{player_2} has {player_2.get_betting_cards()} betting cards and {player_2.get_tokens()} pyramid tokens"
-        )
-        print("\n")
+        lines += ["", ""]
+        return lines
 
     def get_player_input(self, player: Player) -> tuple[MoveType, Any]:
         """Returns a valid move that the `player` would like to take."""
@@ -182,7 +204,7 @@ class Interface:
                                 color = Color.purple
                         move = (
                             MoveType.bet,
-                            self.game.available_betting_tickets[color][-1],
+                            self.game.ticket_status()[color],
                         )
                         break
                 break
@@ -199,13 +221,13 @@ class Interface:
     def finish_game(self):
         self.clear()
 
-        if player_1.coins > player_2.coins:
-            winner = player_1
-        elif player_2.coins > player_1.coins:
-            winner = player_2
+        if self.player_1.coins > self.player_2.coins:
+            winner = self.player_1
+        elif self.player_2.coins > self.player_1.coins:
+            winner = self.player_2
         else:
             print(
-                f"{player_1.name} and {player_2.name} have tied with {player_1.coins} coins!"
+                f"{self.player_1.name} and {self.player_2.name} have tied with {self.player_1.coins} coins!"
             )
             return
 
@@ -0,0 +1,226 @@
+"""
+Leg outcome enumeration used by `Game.EV`.
+
+Instead of replaying every (dice order, roll values) pair from scratch, the
+engine recurses over the set of dice still in the pyramid: at each step it
+branches on which die comes out next and what it shows, and passes the
+resulting packed board down. Paths that share a prefix share the work, and
+identical (board, remaining dice) pairs reached in different orders are only
+expanded once.
+
+Results are integer tallies over all `k! * faces^k` equally likely leaf
+outcomes, so probabilities derived from them are exactly the ones the
+plain permutation x product enumeration produces. Every engine tallies the
+full finishing order; EV only needs its first two ranks, and the rest
+serves `Game.rank_probabilities` from the same enumeration.
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import packed
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def leg_ranks(
+    state: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int]
+) -> tuple[list[list[int]], list[int], int]:
+    """Enumerates every way the rest of the leg can play out from the packed board `state`.
+    `remaining` is a bitmask of camel indices whose dice have not been rolled yet.
+    Returns, per camel index, how many outcomes finish with it in each rank (0 is first), the sum of its
+    final squares over all outcomes, and the total number of outcomes."""
+    memo = {}
+    cells = num_camels * num_camels
+
+    def walk(state: int, remaining: int) -> tuple[list[int], list[int], int]:
+        key = (state, remaining)
+        if key in memo:
+            return memo[key]
+
+        # ranks is flattened: ranks[camel * num_camels + rank]
+        ranks = [0] * cells
+        squares = [0] * num_camels
+        if remaining == 0:
+            for rank, i in enumerate(packed.ranking(state, num_camels)):
+                ranks[i * num_camels + rank] = 1
+                squares[i] = packed.square_of(state, i)
+            memo[key] = (ranks, squares, 1)
+            return memo[key]
+
+        combos = 0
+        for i in range(num_camels):
+            if not remaining & (1 << i):
+                continue
+            rest = remaining & ~(1 << i)
+            for face in faces:
+                next_state, _, _ = packed.move(state, i, face, num_squares, num_camels)
+                child_ranks, child_squares, child_combos = walk(next_state, rest)
+                for j in range(cells):
+                    ranks[j] += child_ranks[j]
+                for j in range(num_camels):
+                    squares[j] += child_squares[j]
+                combos += child_combos
+
+        memo[key] = (ranks, squares, combos)
+        return memo[key]
+
+    ranks, squares, combos = walk(state, remaining)
+    return [ranks[i * num_camels : (i + 1) * num_camels] for i in range(num_camels)], squares, combos
+
+
+def final_rows(
+    state: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int]
+):
+    """Builds every (dice order, roll vector) row of the rest of the leg as a NumPy array and moves the camels
+    of all rows at once. Returns the final squares and packed fields of every camel, one row per outcome."""
+    dice = [i for i in range(num_camels) if remaining & (1 << i)]
+    num_dice = len(dice)
+    orders = list(itertools.permutations(dice))
+    rolls = list(itertools.product(faces, repeat=num_dice))
+    orders = np.array(orders, dtype=np.int64).reshape(len(orders), num_dice)
+    rolls = np.array(rolls, dtype=np.int64).reshape(len(rolls), num_dice)
+    num_rows = len(orders) * len(rolls)
+    order_rows = np.repeat(orders, len(rolls), axis=0)
+    roll_rows = np.tile(rolls, (len(orders), 1))
+
+    fields = np.array([packed.field_of(state, i) for i in range(num_camels)], dtype=np.int64)
+    squares = np.tile(fields >> packed.HEIGHT_BITS, (num_rows, 1))
+    heights = np.tile(fields & packed.HEIGHT_MASK, (num_rows, 1))
+    rows = np.arange(num_rows)
+
+    for step in range(num_dice):
+        mover = order_rows[:, step]
+        square = squares[rows, mover]
+        height = heights[rows, mover]
+        final_square = np.minimum(square + roll_rows[:, step], num_squares - 1)
+
+        # camels on the moving stack, skipping rows where the stack stays put
+        moving = (squares == square[:, None]) & (heights >= height[:, None])
+        moving &= (final_square != square)[:, None]
+        base = (squares == final_square[:, None]).sum(axis=1)
+
+        heights = np.where(moving, heights - height[:, None] + base[:, None], heights)
+        squares = np.where(moving, final_square[:, None], squares)
+
+    return squares, (squares << packed.HEIGHT_BITS) | heights
+
+
+def leg_ranks_numpy(
+    state: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int]
+) -> tuple[list[list[int]], list[int], int]:
+    """Same tallies as `leg_ranks`, computed on the rows of `final_rows`. Requires NumPy."""
+    squares, ranking = final_rows(state, remaining, num_squares, num_camels, faces)
+    # sorting the fields leader-first gives the camel in each rank, and sorting again gives the rank of each camel
+    order = np.argsort(-ranking, axis=1)
+    rank_of = np.argsort(order, axis=1)
+    cells = np.bincount((np.arange(num_camels) * num_camels + rank_of).ravel(), minlength=num_camels * num_camels)
+    ranks = [[int(x) for x in cells[i * num_camels : (i + 1) * num_camels]] for i in range(num_camels)]
+    return ranks, [int(x) for x in squares.sum(axis=0)], len(ranking)
+
+
+def sample_leg_outcomes(
+    state: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int], samples: int, rng
+) -> tuple[list[int], list[int], int]:
+    """Tallies how many of `samples` legs, played out at random with `rng`, finish with each camel first and second."""
+    dice = [i for i in range(num_camels) if remaining & (1 << i)]
+    first_place = [0] * num_camels
+    second_place = [0] * num_camels
+    for _ in range(samples):
+        rng.shuffle(dice)
+        end = state
+        for i in dice:
+            end, _, _ = packed.move(end, i, faces[int(rng.random() * len(faces))], num_squares, num_camels)
+        first, second = packed.winners(end, num_camels)
+        first_place[first] += 1
+        second_place[second] += 1
+    return first_place, second_place, samples
+
+
+def select_rank_engine(method: str = "auto"):
+    """Returns the rank tally function for `method`: "recursive", "numpy", or "auto" to use NumPy when it is installed."""
+    if method == "auto":
+        method = "numpy" if np is not None else "recursive"
+    if method == "numpy":
+        if np is None:
+            raise Exception("The numpy leg engine was requested but NumPy is not installed.")
+        return leg_ranks_numpy
+    if method == "recursive":
+        return leg_ranks
+    raise Exception(f"Unknown leg engine {method!r}.")
+
+
+# process pools are expensive to start, so one is kept per worker count and reused
+_pools = {}
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Returns the shared process pool with `workers` processes, starting it on first use."""
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _pools[workers]
+
+
+def shutdown_pools():
+    """Stops every shared process pool."""
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def first_die_ranks(
+    state: int, index: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int], method: str
+) -> tuple[list[list[int]], list[int], int]:
+    """Tallies the ranks of the leg in which camel `index`'s die comes out of the pyramid first."""
+    engine = select_rank_engine(method)
+    rest = remaining & ~(1 << index)
+    ranks = [[0] * num_camels for _ in range(num_camels)]
+    squares = [0] * num_camels
+    combos = 0
+    for face in faces:
+        next_state, _, _ = packed.move(state, index, face, num_squares, num_camels)
+        child_ranks, child_squares, child_combos = engine(next_state, rest, num_squares, num_camels, faces)
+        add_ranks(ranks, squares, child_ranks, child_squares)
+        combos += child_combos
+    return ranks, squares, combos
+
+
+def leg_ranks_parallel(
+    state: int,
+    remaining: int,
+    num_squares: int,
+    num_camels: int,
+    faces: tuple[int],
+    workers: int,
+    threshold: int = 5,
+    method: str = "auto",
+) -> tuple[list[list[int]], list[int], int]:
+    """Same tallies as `leg_ranks`, with the work split by the first die color across a process pool of `workers`.
+    Only the packed board is sent to each worker. With fewer than `threshold` dice left the leg is evaluated in-process."""
+    dice = [i for i in range(num_camels) if remaining & (1 << i)]
+    if workers <= 1 or len(dice) < threshold:
+        return select_rank_engine(method)(state, remaining, num_squares, num_camels, faces)
+
+    pool = get_pool(workers)
+    futures = [
+        pool.submit(first_die_ranks, state, i, remaining, num_squares, num_camels, faces, method)
+        for i in dice
+    ]
+    ranks = [[0] * num_camels for _ in range(num_camels)]
+    squares = [0] * num_camels
+    combos = 0
+    for future in futures:
+        child_ranks, child_squares, child_combos = future.result()
+        add_ranks(ranks, squares, child_ranks, child_squares)
+        combos += child_combos
+    return ranks, squares, combos
+
+
+def add_ranks(ranks: list[list[int]], squares: list[int], child_ranks: list[list[int]], child_squares: list[int]):
+    """Adds one branch's rank tallies and square sums into the running totals."""
+    for i, row in enumerate(child_ranks):
+        for rank, count in enumerate(row):
+            ranks[i][rank] += count
+        squares[i] += child_squares[i]
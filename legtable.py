@@ -0,0 +1,168 @@
+"""
+Precomputed leg outcome table shared between processes through mmap.
+
+The first leg of every game starts from one of a small number of boards
+(every camel on the first few squares, all five dice in the pyramid), and
+it is also the most expensive leg to enumerate. `build` computes the leg
+outcome tallies of all of them once and writes them to a fixed-layout file;
+`LegTable.open` memory-maps it read-only, so every process on the machine
+shares the same page-cached copy. Set `Game.leg_table` to the opened table
+and `Game.EV` looks boards up there first, falling back to computing them.
+
+File layout: a header followed by an open-addressing hash table of
+`num_slots` fixed-size slots. Each slot is a 64-bit key (the canonical
+packed board with the remaining dice bitmask above it) followed by the
+first-place and second-place counts of every camel as 32-bit ints.
+"""
+
+import itertools
+import mmap
+import os
+import struct
+from game import *
+from cache import canonical_key
+import leg
+import packed
+
+MAGIC = b"CAMLTBL1"
+HEADER = struct.Struct("<8sHHHHQ")  # magic, num_camels, num_squares, lowest face, highest face, num_slots
+EMPTY = (1 << 64) - 1
+REMAINING_SHIFT = 56  # above the packed board of up to 7 camels
+
+
+def table_key(state: int, remaining: int) -> int:
+    return state | (remaining << REMAINING_SHIFT)
+
+
+def slot_of(key: int, bits: int) -> int:
+    """Fibonacci hashing of a 64-bit key into a table of 2**bits slots."""
+    return ((key * 0x9E3779B97F4A7C15) & EMPTY) >> (64 - bits)
+
+
+class LegTable:
+    """Read-only view of a leg outcome table file."""
+
+    def __init__(self, path: str):
+        """Memory-maps the table at `path`."""
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_camels, self.num_squares, low, high, self.num_slots = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise Exception(f"{path} is not a leg outcome table.")
+        self.faces = tuple(range(low, high + 1))
+        self.bits = self.num_slots.bit_length() - 1
+        self.slot = struct.Struct(f"<Q{2 * self.num_camels}I")
+        self.all_dice = (1 << self.num_camels) - 1
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path: str) -> "LegTable":
+        return cls(path)
+
+    def lookup(self, state: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int]):
+        """Returns the (first, second, combos) tallies for a packed board, or None if the table does not have it."""
+        if (num_camels, num_squares, faces) != (self.num_camels, self.num_squares, self.faces):
+            return None
+        state = canonical_key(state, remaining, num_squares, num_camels, faces)[0]
+        key = table_key(state, remaining)
+
+        index = slot_of(key, self.bits)
+        while True:
+            fields = self.slot.unpack_from(self.map, HEADER.size + index * self.slot.size)
+            if fields[0] == key:
+                self.hits += 1
+                first = fields[1 : 1 + num_camels]
+                second = fields[1 + num_camels :]
+                # every outcome has exactly one winner, so the first-place counts add up to the total
+                return first, second, sum(first)
+            if fields[0] == EMPTY:
+                self.misses += 1
+                return None
+            index = (index + 1) % self.num_slots
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def start_of_leg_boards(num_camels: int, squares: int):
+    """Yields every packed board with all camels on the first `squares` squares, in every stacking order."""
+    for order in itertools.permutations(range(num_camels)):
+        # cut the ordering into consecutive stacks, one per square, each possibly empty
+        for cuts in itertools.combinations_with_replacement(range(num_camels + 1), squares - 1):
+            bounds = (0,) + cuts + (num_camels,)
+            state = 0
+            for square in range(squares):
+                stack = order[bounds[square] : bounds[square + 1]]
+                for height, index in enumerate(stack):
+                    field = (square << packed.HEIGHT_BITS) | height
+                    state |= field << (index * packed.CAMEL_BITS)
+            yield state
+
+
+def build(
+    path: str,
+    boards,
+    num_squares: int = 16,
+    num_camels: int = len(Color),
+    faces: tuple[int] = (1, 2, 3),
+    workers: int = 1,
+    progress=None,
+):
+    """Computes the leg outcomes of every (packed board, remaining dice) pair in `boards` and writes the table to `path`."""
+    if num_camels > 7:
+        raise Exception("Leg outcome tables hold boards of at most 7 camels.")
+    entries = {}
+    for state, remaining in boards:
+        state = canonical_key(state, remaining, num_squares, num_camels, faces)[0]
+        key = table_key(state, remaining)
+        if key in entries:
+            continue
+        ranks, _, _ = leg.leg_ranks_parallel(state, remaining, num_squares, num_camels, faces, workers)
+        entries[key] = [r[0] for r in ranks] + [r[1] for r in ranks]
+        if progress is not None:
+            progress(len(entries))
+
+    num_slots = 1
+    while num_slots < 2 * len(entries):
+        num_slots *= 2
+    bits = num_slots.bit_length() - 1
+    slot = struct.Struct(f"<Q{2 * num_camels}I")
+
+    empty = slot.pack(EMPTY, *([0] * 2 * num_camels))
+    table = bytearray(HEADER.size) + empty * num_slots
+    HEADER.pack_into(table, 0, MAGIC, num_camels, num_squares, faces[0], faces[-1], num_slots)
+    for key, counts in entries.items():
+        index = slot_of(key, bits)
+        while slot.unpack_from(table, HEADER.size + index * slot.size)[0] != EMPTY:
+            index = (index + 1) % num_slots
+        slot.pack_into(table, HEADER.size + index * slot.size, key, *counts)
+
+    # write to a temporary file first so readers never map a half-written table
+    with open(path + ".tmp", "wb") as f:
+        f.write(table)
+    os.replace(path + ".tmp", path)
+    return len(entries)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute the leg outcome table for start-of-leg boards.")
+    parser.add_argument("path", help="where to write the table")
+    parser.add_argument("--squares", type=int, default=3, help="spread the camels over this many squares (default: 3)")
+    parser.add_argument("--workers", type=int, default=1, help="processes to enumerate with")
+    args = parser.parse_args()
+
+    num_camels = len(Color)
+    all_dice = (1 << num_camels) - 1
+    boards = [(state, all_dice) for state in start_of_leg_boards(num_camels, args.squares)]
+    count = build(
+        args.path,
+        boards,
+        workers=args.workers,
+        progress=lambda done: print(f"\r{done}/{len(boards)} boards", end="", flush=True),
+    )
+    print(f"\nWrote {count} boards to {args.path}")
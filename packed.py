@@ -0,0 +1,129 @@
+"""
+Compact integer encoding of the board.
+
+Each camel gets one 8-bit field inside a single int: the high 5 bits hold the
+square and the low 3 bits hold the camel's height in its stack (0 is the
+bottom). Camel `i` lives in bits `8 * i` to `8 * i + 7`, where `i` is the
+camel's position in the game's camel list.
+
+Because the square sits above the height, comparing two fields compares
+the camels' race positions directly, so the leader is simply the camel
+with the largest field. The kernels below only use int arithmetic and never
+build lists, which keeps them cheap enough to run inside the EV loops.
+"""
+
+from helper import *
+
+SQUARE_BITS = 5
+HEIGHT_BITS = 3
+CAMEL_BITS = SQUARE_BITS + HEIGHT_BITS
+CAMEL_MASK = (1 << CAMEL_BITS) - 1
+HEIGHT_MASK = (1 << HEIGHT_BITS) - 1
+MAX_SQUARES = 1 << SQUARE_BITS
+
+
+def pack(blocks: list[list[Camel]], camels: list[Camel]) -> int:
+    """Encodes `blocks` as a packed int. Camel `i` is the camel matching `camels[i]`."""
+    index = {camel.color: i for i, camel in enumerate(camels)}
+    state = 0
+    for square, block in enumerate(blocks):
+        for height, camel in enumerate(block):
+            field = (square << HEIGHT_BITS) | height
+            state |= field << (index[camel.color] * CAMEL_BITS)
+    return state
+
+
+def unpack(state: int, camels: list[Camel], num_squares: int) -> list[list[Camel]]:
+    """Decodes a packed int back into a list of squares, using the given `camels` as the board pieces."""
+    blocks = [[] for _ in range(num_squares)]
+    placed = sorted((field_of(state, i), i) for i in range(len(camels)))
+    for field, i in placed:
+        blocks[field >> HEIGHT_BITS].append(camels[i])
+    return blocks
+
+
+def field_of(state: int, index: int) -> int:
+    """Returns the 8-bit (square, height) field of camel `index`."""
+    return (state >> (index * CAMEL_BITS)) & CAMEL_MASK
+
+
+def square_of(state: int, index: int) -> int:
+    """Returns the square of camel `index`."""
+    return field_of(state, index) >> HEIGHT_BITS
+
+
+def height_of(state: int, index: int) -> int:
+    """Returns the stack height of camel `index`, 0 being the bottom."""
+    return field_of(state, index) & HEIGHT_MASK
+
+
+def move(
+    state: int, index: int, distance: int, num_squares: int, num_camels: int
+) -> tuple[int, int, bool]:
+    """Packed equivalent of `Game.move_camel`. Moves camel `index` and everything stacked on it by `distance`.
+    Returns the new state, the final square of the moved stack, and whether the move ended the game."""
+    field = (state >> (index * CAMEL_BITS)) & CAMEL_MASK
+    square = field >> HEIGHT_BITS
+    height = field & HEIGHT_MASK
+
+    final_square = square + distance
+    game_end = False
+    if final_square >= num_squares:
+        final_square = num_squares - 1
+        game_end = True
+    if final_square == square:
+        return state, final_square, game_end
+
+    # count the camels already waiting on the destination square
+    base = 0
+    for i in range(num_camels):
+        if ((state >> (i * CAMEL_BITS)) & CAMEL_MASK) >> HEIGHT_BITS == final_square:
+            base += 1
+
+    # lift our camel and everything above it onto the destination stack
+    for i in range(num_camels):
+        shift = i * CAMEL_BITS
+        other = (state >> shift) & CAMEL_MASK
+        if other >> HEIGHT_BITS == square and other & HEIGHT_MASK >= height:
+            moved = (final_square << HEIGHT_BITS) | (base + (other & HEIGHT_MASK) - height)
+            state ^= (other ^ moved) << shift
+
+    return state, final_square, game_end
+
+
+def winners(state: int, num_camels: int) -> tuple[int, int]:
+    """Packed equivalent of `Game.get_winning_camels`. Returns the indices of the first and second place camels."""
+    first = second = -1
+    first_field = second_field = -1
+    for i in range(num_camels):
+        field = (state >> (i * CAMEL_BITS)) & CAMEL_MASK
+        if field > first_field:
+            second, second_field = first, first_field
+            first, first_field = i, field
+        elif field > second_field:
+            second, second_field = i, field
+    return first, second
+
+
+def ranking(state: int, num_camels: int) -> list[int]:
+    """Returns the camel indices ordered by race position, leader first."""
+    return sorted(range(num_camels), key=lambda i: (state >> (i * CAMEL_BITS)) & CAMEL_MASK, reverse=True)
+
+
+def rear_square(state: int, num_camels: int) -> int:
+    """Returns the square of the camel furthest behind."""
+    return min(((state >> (i * CAMEL_BITS)) & CAMEL_MASK) >> HEIGHT_BITS for i in range(num_camels))
+
+
+def lead_square(state: int, num_camels: int) -> int:
+    """Returns the square of the camel furthest ahead."""
+    return max(((state >> (i * CAMEL_BITS)) & CAMEL_MASK) >> HEIGHT_BITS for i in range(num_camels))
+
+
+def shift_back(state: int, squares: int, num_camels: int) -> int:
+    """Moves every camel `squares` squares backwards, keeping all stacks intact.
+    No camel may end up behind square 0."""
+    ones = 0
+    for i in range(num_camels):
+        ones |= 1 << (i * CAMEL_BITS)
+    return state - (squares << HEIGHT_BITS) * ones
@@ -0,0 +1,83 @@
+"""
+Speculative EV precomputation while a player is deciding on their move.
+
+`Precomputer.start` queues the leg outcomes of the current position and of
+every position the next roll can lead to on a background thread. The
+results land in `Game.leg_cache`, so the `Game.EV` call of the next redraw
+is a cache hit whichever move the player picks. Starting again for a new
+position cancels whatever is still queued for the old one.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from game import *
+import packed
+
+
+class Precomputer:
+    """Warms `Game.leg_cache` in the background for the current position and the positions one roll away."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ev-precompute")
+        self.generation = 0  # bumped on every start/cancel so stale tasks skip their work
+        self.futures = []
+        self.lock = threading.Lock()
+
+    def speculative_states(self, game: Game) -> list[tuple[int, int]]:
+        """Returns the (packed board, remaining dice) pairs worth computing, most urgent first:
+        the current position, then every position after each possible roll."""
+        state = game.to_packed()
+        remaining = game.remaining_dice()
+        num_camels = len(game.camels)
+        all_dice = (1 << num_camels) - 1
+
+        states = [(state, remaining)]
+        for i in range(num_camels):
+            if not remaining & (1 << i):
+                continue
+            rest = remaining & ~(1 << i)
+            for face in game.faces:
+                next_state, _, game_end = packed.move(state, i, face, game.num_squares, num_camels)
+                if game_end:
+                    continue
+                # after the last die of the leg, the next redraw shows a fresh leg
+                states.append((next_state, rest if rest else all_dice))
+        return states
+
+    def start(self, game: Game):
+        """Cancels any queued work and starts precomputing for the current state of `game`."""
+        if game.leg_cache is None:
+            return
+        with self.lock:
+            self.cancel_locked()
+            generation = self.generation
+            for state, remaining in self.speculative_states(game):
+                self.futures.append(self.executor.submit(self.compute, game, state, remaining, generation))
+
+    def compute(self, game: Game, state: int, remaining: int, generation: int):
+        if generation != self.generation:
+            return
+        game.packed_leg_outcomes(state, remaining)
+
+    def cancel(self):
+        """Drops every queued task. A task already running finishes, but its result is still a valid cache entry."""
+        with self.lock:
+            self.cancel_locked()
+
+    def cancel_locked(self):
+        self.generation += 1
+        for future in self.futures:
+            future.cancel()
+        self.futures = []
+
+    def wait(self, timeout: float = None) -> bool:
+        """Blocks until the queued work is done. Returns whether it all finished within `timeout`."""
+        with self.lock:
+            futures = list(self.futures)
+        _, not_done = wait(futures, timeout)
+        return not not_done
+
+    def shutdown(self):
+        """Cancels queued work and stops the background thread."""
+        self.cancel()
+        self.executor.shutdown(wait=True)
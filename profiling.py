@@ -0,0 +1,113 @@
+"""
+Opt-in call counting and timing for the `Game` hot paths.
+
+While profiling is off, `Game` runs its original methods untouched, so there
+is no overhead at all. `enable()` swaps timing wrappers onto the class and
+`disable()` puts the originals back:
+
+    with profiling.profile() as profiler:
+        game.EV()
+    print(profiler.snapshot())
+
+Times are inclusive, so the time of `EV` also counts the `ticket_status`
+calls it makes.
+"""
+
+import time
+from contextlib import contextmanager
+from functools import wraps
+from game import Game
+
+INSTRUMENTED = [
+    "move_camel",
+    "expected_winner",
+    "EV",
+    "dice_status",
+    "ticket_status",
+    "get_winning_camels",
+]
+
+
+class Profiler:
+    """Accumulates call counts and wall time per method."""
+
+    def __init__(self):
+        self.calls = {name: 0 for name in INSTRUMENTED}
+        self.seconds = {name: 0.0 for name in INSTRUMENTED}
+
+    def record(self, name: str, seconds: float):
+        self.calls[name] += 1
+        self.seconds[name] += seconds
+
+    def snapshot(self) -> dict:
+        """Returns the counters so far as {method: {"calls", "seconds", "seconds_per_call"}}."""
+        return {
+            name: {
+                "calls": self.calls[name],
+                "seconds": self.seconds[name],
+                "seconds_per_call": self.seconds[name] / self.calls[name] if self.calls[name] else 0.0,
+            }
+            for name in INSTRUMENTED
+        }
+
+    def reset(self):
+        """Zeroes every counter."""
+        for name in INSTRUMENTED:
+            self.calls[name] = 0
+            self.seconds[name] = 0.0
+
+
+# every profiler currently collecting; each wrapped call is recorded in all of them
+_active = []
+_originals = {}
+
+
+def _wrap(name: str, method):
+    @wraps(method)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            for profiler in _active:
+                profiler.record(name, elapsed)
+
+    return timed
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def enable(profiler: Profiler = None) -> Profiler:
+    """Starts recording into `profiler` (a new one by default) and returns it."""
+    profiler = profiler or Profiler()
+    if not _originals:
+        for name in INSTRUMENTED:
+            _originals[name] = getattr(Game, name)
+            setattr(Game, name, _wrap(name, _originals[name]))
+    _active.append(profiler)
+    return profiler
+
+
+def disable(profiler: Profiler = None):
+    """Stops recording into `profiler` (every profiler by default). Restores the original methods once none are left."""
+    if profiler is None:
+        _active.clear()
+    elif profiler in _active:
+        _active.remove(profiler)
+    if not _active:
+        for name, method in _originals.items():
+            setattr(Game, name, method)
+        _originals.clear()
+
+
+@contextmanager
+def profile():
+    """Records the calls made inside the `with` block into a fresh Profiler."""
+    profiler = enable()
+    try:
+        yield profiler
+    finally:
+        disable(profiler)
@@ -0,0 +1,107 @@
+"""
+Monte Carlo estimate of who wins and who finishes last in the whole race.
+
+Exact enumeration stops being practical beyond the current leg, so this
+module plays the race out to the finish many times on the packed board,
+starting from the current `Game` (dice already rolled this leg stay out of
+the pyramid until the next leg). Rollouts continue in batches until the
+confidence interval of every camel's win and lose probability is narrower
+than the target, or the time budget runs out.
+"""
+
+import math
+import random
+import time
+from game import *
+import packed
+
+
+class RaceEstimate:
+    """Finishing probabilities for every camel, with the sampling details behind them."""
+
+    def __init__(self, win: dict, lose: dict, samples: int, width: float, seconds: float, converged: bool):
+        self.win = win  # probability each color crosses the line first
+        self.lose = lose  # probability each color is last when the race ends
+        self.samples = samples
+        self.width = width  # widest confidence interval over every camel, win and lose
+        self.seconds = seconds
+        self.converged = converged  # whether `width` reached the target before the time budget ran out
+
+
+def interval_width(successes: int, samples: int, z: float) -> float:
+    """Returns the width of the Wilson score interval for a proportion."""
+    p = successes / samples
+    denominator = 1 + z * z / samples
+    half_width = z * math.sqrt(p * (1 - p) / samples + z * z / (4 * samples * samples)) / denominator
+    return 2 * half_width
+
+
+def rollout(
+    state: int, remaining: int, num_squares: int, num_camels: int, faces: tuple[int], rng: random.Random
+) -> tuple[int, int]:
+    """Plays the race out from a packed board to the finish. Returns the indices of the winning and last camel."""
+    all_dice = (1 << num_camels) - 1
+    while True:
+        if remaining == 0:
+            remaining = all_dice
+        # pick a uniformly random set bit of `remaining`
+        dice = [i for i in range(num_camels) if remaining & (1 << i)]
+        index = dice[int(rng.random() * len(dice))]
+        remaining &= ~(1 << index)
+
+        state, _, game_end = packed.move(state, index, rng.choice(faces), num_squares, num_camels)
+        if game_end:
+            break
+
+    first, _ = packed.winners(state, num_camels)
+    last = min(range(num_camels), key=lambda i: packed.field_of(state, i))
+    return first, last
+
+
+def estimate_race(
+    game: Game,
+    target_width: float = 0.02,
+    time_budget: float = 0.5,
+    confidence: float = 0.95,
+    batch: int = 250,
+    seed: int = None,
+) -> RaceEstimate:
+    """Estimates each camel's chance of winning and of finishing last from the current state of `game`.
+    Stops once every 95% (by default) confidence interval is narrower than `target_width`, or after `time_budget` seconds.
+    Without a `seed`, the rollouts are seeded from `game.rng`."""
+    z = {0.9: 1.645, 0.95: 1.96, 0.99: 2.576}.get(confidence)
+    if z is None:
+        raise Exception(f"Unsupported confidence level {confidence}, use 0.9, 0.95 or 0.99.")
+
+    # the number of rollouts depends on timing, so they get a stream of their own instead of moving the game's dice
+    rng = random.Random(seed if seed is not None else game.rng.getrandbits(64))
+    state = game.to_packed()
+    remaining = game.remaining_dice()
+    num_camels = len(game.camels)
+    faces = game.faces
+
+    wins = [0] * num_camels
+    losses = [0] * num_camels
+    samples = 0
+    width = 1.0
+    start = time.perf_counter()
+    deadline = start + time_budget
+    while True:
+        for _ in range(batch):
+            first, last = rollout(state, remaining, game.num_squares, num_camels, faces, rng)
+            wins[first] += 1
+            losses[last] += 1
+        samples += batch
+
+        width = max(interval_width(count, samples, z) for count in wins + losses)
+        if width <= target_width or time.perf_counter() >= deadline:
+            break
+
+    return RaceEstimate(
+        win={camel.color: wins[i] / samples for i, camel in enumerate(game.camels)},
+        lose={camel.color: losses[i] / samples for i, camel in enumerate(game.camels)},
+        samples=samples,
+        width=width,
+        seconds=time.perf_counter() - start,
+        converged=width <= target_width,
+    )
@@ -0,0 +1,105 @@
+"""
+Incremental terminal renderer.
+
+Each frame is a list of text lines. Instead of clearing the screen and
+printing everything again, `Renderer.draw` compares the frame with the one
+on screen and rewrites only the lines that changed, using ANSI cursor
+movement, in a single write. The colored fragments for camels, tickets and
+dice are built once and reused.
+"""
+
+import shutil
+import sys
+from termcolor import colored
+from helper import *
+
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+
+def move_to(row: int) -> str:
+    """Returns the escape sequence moving the cursor to the start of `row` (0 is the top line)."""
+    return f"\x1b[{row + 1};1H"
+
+
+class Renderer:
+    """Draws frames of lines on a terminal, redrawing only what changed since the previous frame."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.previous = None  # lines currently on screen, None when the screen state is unknown
+        self.camels = {}
+        self.tickets = {}
+        self.dice = {}
+
+    def camel(self, camel: Camel) -> str:
+        """Returns the colored letter of a camel."""
+        if camel.color not in self.camels:
+            self.camels[camel.color] = str(camel)
+        return self.camels[camel.color]
+
+    def ticket(self, ticket: BettingTicket) -> str:
+        """Returns the colored value of a betting ticket."""
+        key = (ticket.color, ticket.value)
+        if key not in self.tickets:
+            self.tickets[key] = repr(ticket)
+        return self.tickets[key]
+
+    def die(self, color: Color, result: int) -> str:
+        """Returns a die face: its result on its color, or a blank face if it has not been rolled."""
+        key = (color, result)
+        if key not in self.dice:
+            face = "   " if result == 0 else result
+            self.dice[key] = colored(face, "white", f"on_{color.value.lower()}")
+        return self.dice[key]
+
+    def stack(self, camels: list[Camel]) -> str:
+        """Returns a square's camels formatted like a printed list."""
+        return "[" + ", ".join(self.camel(camel) for camel in camels) + "]"
+
+    def clear(self):
+        """Clears the screen. The next frame is drawn in full."""
+        self.stream.write(CLEAR_SCREEN)
+        self.stream.flush()
+        self.previous = []
+
+    def fit(self, lines: list[str], rows: int) -> list[str]:
+        """Shortens a frame to at most `rows` lines: runs of blank lines are collapsed first, then blank lines are
+        dropped, and only then is the end cut off with a note of how much is missing."""
+        if len(lines) <= rows:
+            return lines
+        lines = [line for i, line in enumerate(lines) if line or (i > 0 and lines[i - 1])]
+        if len(lines) <= rows:
+            return lines
+        lines = [line for line in lines if line]
+        if len(lines) <= rows:
+            return lines
+        hidden = len(lines) - rows + 1
+        return lines[: rows - 1] + [f"... {hidden} more lines, enlarge the terminal to see them"]
+
+    def draw(self, lines: list[str], reserve: int = 0):
+        """Puts `lines` on screen, rewriting only the lines that differ from the previous frame.
+        Anything printed below the previous frame, such as input prompts, is erased.
+        `reserve` is how many lines will be printed below the frame before the next draw; the frame is
+        shortened with `fit` so that it and those lines fit on screen without scrolling."""
+        rows = shutil.get_terminal_size().lines - reserve - 1
+        if rows > 0:
+            lines = self.fit(lines, rows)
+        if self.previous is None or rows <= 0:
+            # without a known screen, or when not even a shortened frame fits, absolute positions are meaningless
+            output = [CLEAR_SCREEN, "\n".join(lines), "\n"]
+        else:
+            output = []
+            for row, line in enumerate(lines):
+                if row >= len(self.previous) or self.previous[row] != line:
+                    output.append(move_to(row) + line + CLEAR_LINE)
+            output.append(move_to(len(lines)) + CLEAR_BELOW)
+
+        self.stream.write("".join(output))
+        self.stream.flush()
+        self.previous = list(lines)
+
+    def forget(self):
+        """Marks the screen contents as unknown, e.g. after printing outside of `draw`. The next frame is drawn in full."""
+        self.previous = None
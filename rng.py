@@ -0,0 +1,61 @@
+"""
+Seedable random number streams for games and simulations.
+
+Every `Game` draws its starting board and its dice from its own `GameRandom`
+instead of the module-level `random` functions, so a game is reproducible
+from its seed alone. `GameRandom.stream` derives independent streams from a
+base seed and a stream number, which lets parallel workers each own a
+stream and still produce the same results however the work is split.
+
+Dice rolls use a single uniform draw for both the die and its face, taken
+from a block of draws generated up front.
+"""
+
+import random
+
+
+class GameRandom(random.Random):
+    """A `random.Random` that also rolls pyramid dice from pre-generated blocks of draws."""
+
+    def __init__(self, seed=None, block_size: int = 1024):
+        """Creates a stream seeded with `seed`, or from system entropy when it is None.
+        Dice draws are generated `block_size` at a time."""
+        self.block_size = block_size
+        self.block = []
+        self.position = 0
+        super().__init__(seed)
+
+    @classmethod
+    def stream(cls, seed: int, number: int, block_size: int = 1024) -> "GameRandom":
+        """Returns stream `number` of the family seeded by `seed`. Different numbers give independent streams,
+        and the same (seed, number) pair always gives the same stream, in any process."""
+        # string seeds are hashed with SHA-512, so they do not depend on PYTHONHASHSEED
+        return cls(f"{seed}/{number}", block_size)
+
+    def seed(self, *args, **kwargs):
+        """Reseeds the stream, throwing away any pre-generated draws."""
+        super().seed(*args, **kwargs)
+        self.block = []
+        self.position = 0
+
+    def getstate(self):
+        return super().getstate(), self.block, self.position
+
+    def setstate(self, state):
+        state, block, position = state
+        super().setstate(state)
+        self.block = list(block)
+        self.position = position
+
+    def roll(self, colors: list, low: int, high: int) -> tuple:
+        """Picks one of `colors` and a face from `low` to `high`, all equally likely. Returns (color, face)."""
+        if self.position == len(self.block):
+            draw_one = self.random
+            self.block = [draw_one() for _ in range(self.block_size)]
+            self.position = 0
+        draw = self.block[self.position]
+        self.position += 1
+
+        faces = high - low + 1
+        index = int(draw * len(colors) * faces)
+        return colors[index // faces], low + index % faces
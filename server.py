@@ -0,0 +1,242 @@
+"""
+Asyncio game server hosting many tables in one process.
+
+Clients talk newline-delimited JSON over TCP or a Unix socket. Every request
+is an object with an "op" field and gets exactly one reply, either
+{"ok": true, ...} or {"ok": false, "error": "..."}. Clients that joined a
+table also receive {"event": "state", ...} messages whenever it changes.
+
+    {"op": "create", "players": ["Alice", "Bob"]}          -> {"ok": true, "table": 1}
+    {"op": "join", "table": 1}                             -> subscribe to the table's updates
+    {"op": "state", "table": 1}
+    {"op": "move", "table": 1, "player": "Alice", "move": "roll"}
+    {"op": "move", "table": 1, "player": "Bob", "move": "bet", "color": "red"}
+    {"op": "ev", "table": 1}
+    {"op": "close", "table": 1}
+
+Moves are checked with `Game.is_valid_move`. EV enumeration runs in an
+executor (a process pool by default) so a slow evaluation on one table
+never holds up the others.
+"""
+
+import asyncio
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor
+from game import *
+
+MAX_WRITE_BUFFER = 1 << 20  # subscribers that fall this far behind are disconnected
+
+
+class Table:
+    """One game session: the game, its players, whose turn it is and who is watching."""
+
+    def __init__(self, table_id: int, names: list[str]):
+        self.id = table_id
+        self.game = Game()
+        self.players = [Player(name) for name in names]
+        self.current = 0
+        self.finished = False
+        self.version = 0  # bumped on every change, so clients can tell stale EVs apart
+        self.subscribers = set()
+
+    def player(self, name: str) -> Player:
+        for player in self.players:
+            if player.name == name:
+                return player
+        raise Exception(f"No player named {name!r} at table {self.id}.")
+
+    def play(self, name: str, move: tuple[MoveType, Any]) -> str:
+        """Applies a move for the player called `name`. Returns a description of what happened."""
+        if self.finished:
+            raise Exception("The game has finished.")
+        player = self.player(name)
+        if player is not self.players[self.current]:
+            raise Exception(f"It is {self.players[self.current].name}'s turn.")
+        if not self.game.is_valid_move(move):
+            raise Exception("That move is not valid.")
+
+        if move[0] == MoveType.bet:
+            self.game.make_bet(move[1], player)
+            message = f"{player.name} has taken the {move[1].color.name} {move[1].value}"
+        else:
+            color, result = self.game.random_roll()
+            undo = self.game.make_roll(color, result, player)
+            message = f"{color.name} has moved by {result}"
+            if undo.game_end:
+                self.finished = True
+
+        if self.finished or self.game.is_finished_leg():
+            self.game.finish_leg(self.players)
+        self.current = (self.current + 1) % len(self.players)
+        self.version += 1
+        return message
+
+    def state(self) -> dict:
+        """Returns the table as plain JSON-serializable data."""
+        return {
+            "table": self.id,
+            "version": self.version,
+            "finished": self.finished,
+            "current": self.players[self.current].name,
+            "board": [[camel.color.name for camel in block] for block in self.game.blocks],
+            "dice": {color.name: result for color, result in self.game.available_dice.items()},
+            "tickets": {color.name: ticket.value for color, ticket in self.game.ticket_status().items()},
+            "players": [
+                {
+                    "name": player.name,
+                    "coins": player.coins,
+                    "tokens": player.get_tokens(),
+                    "tickets": [[ticket.color.name, ticket.value] for ticket in player.get_betting_cards()],
+                }
+                for player in self.players
+            ],
+        }
+
+
+def parse_move(request: dict, game: Game) -> tuple[MoveType, Any]:
+    """Turns the "move" (and "color") fields of a request into a move tuple. Bets take the top ticket of the color."""
+    kind = request.get("move")
+    if kind == "roll":
+        return (MoveType.token, None)
+    if kind == "bet":
+        try:
+            color = Color[str(request.get("color")).lower()]
+        except KeyError:
+            raise Exception(f"Unknown color {request.get('color')!r}.")
+        ticket = game.ticket_status().get(color)
+        if ticket is None:
+            raise Exception(f"There are no {color.name} tickets left.")
+        return (MoveType.bet, ticket)
+    raise Exception(f"Unknown move {kind!r}, expected 'roll' or 'bet'.")
+
+
+class GameServer:
+    """Serves any number of tables to JSON-lines clients."""
+
+    def __init__(self, executor: Executor = None):
+        """EV work runs in `executor`, a process pool by default."""
+        self.executor = executor or ProcessPoolExecutor()
+        self.tables = {}
+        self.next_id = 1
+        self.server = None
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0):
+        """Listens on TCP. Returns the port, which is picked automatically when `port` is 0."""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start_unix(self, path: str):
+        """Listens on a Unix socket at `path`."""
+        self.server = await asyncio.start_unix_server(self.handle, path)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for table in self.tables.values():
+            for writer in list(table.subscribers):
+                writer.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves one client connection until it disconnects."""
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = await self.dispatch(json.loads(line), writer)
+                    reply["ok"] = True
+                except Exception as error:
+                    reply = {"ok": False, "error": str(error)}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for table in self.tables.values():
+                table.subscribers.discard(writer)
+            writer.close()
+
+    def table(self, request: dict) -> Table:
+        table = self.tables.get(request.get("table"))
+        if table is None:
+            raise Exception(f"No table {request.get('table')!r}.")
+        return table
+
+    async def dispatch(self, request: dict, writer: asyncio.StreamWriter) -> dict:
+        """Handles one request and returns its reply."""
+        op = request.get("op")
+        if op == "create":
+            names = request.get("players", [])
+            if len(names) < 2 or len(set(names)) != len(names):
+                raise Exception("A table needs at least two players with different names.")
+            table = Table(self.next_id, names)
+            self.tables[table.id] = table
+            self.next_id += 1
+            return {"table": table.id}
+
+        table = self.table(request)
+        if op == "join":
+            table.subscribers.add(writer)
+            return {"state": table.state()}
+        if op == "state":
+            return {"state": table.state()}
+        if op == "move":
+            message = table.play(request.get("player"), parse_move(request, table.game))
+            self.broadcast(table, message)
+            return {"message": message, "state": table.state()}
+        if op == "ev":
+            return {"version": table.version, "ev": await self.ev(table)}
+        if op == "close":
+            del self.tables[table.id]
+            return {}
+        raise Exception(f"Unknown op {op!r}.")
+
+    async def ev(self, table: Table) -> dict:
+        """Returns the table's ticket EVs keyed by color name, enumerating the leg in the executor on a cache miss."""
+        game = table.game
+        # other connections can take tickets while the leg is enumerated, so price the tent as it is now
+        tickets = game.ticket_status()
+
+        key, entry = game.cached_leg_outcomes(game.to_packed(), game.remaining_dice())
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            ranked = await loop.run_in_executor(self.executor, Game.rank_tallies, key, game.num_squares, game.ev_method)
+            entry = game.store_rank_tallies(key, ranked)
+
+        EVs = game.price_tickets(*game.by_color(*entry), tickets)
+        return {color.name: value for color, value in EVs.items()}
+
+    def broadcast(self, table: Table, message: str):
+        """Sends the table's new state to every subscriber, dropping any that stopped reading."""
+        line = json.dumps({"event": "state", "message": message, "state": table.state()}).encode() + b"\n"
+        for writer in list(table.subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                table.subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(line)
+
+
+async def serve(host: str, port: int, path: str = None):
+    server = GameServer()
+    if path:
+        await server.start_unix(path)
+        print(f"Serving Camel Up on {path}")
+    else:
+        port = await server.start_tcp(host, port)
+        print(f"Serving Camel Up on {host}:{port}")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Host Camel Up tables over TCP or a Unix socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.unix))
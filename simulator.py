@@ -0,0 +1,267 @@
+"""
+Headless game runner for simulating many complete games without any I/O.
+
+Each seat at the table is driven by a `Strategy`, which picks between
+taking a betting ticket and rolling a die, exactly like a human would at
+`Interface.get_player_input`.
+
+All the randomness of a simulator's games, and of strategies created
+without a seed, comes from the simulator's `GameRandom`. `run_parallel`
+gives every chunk of games its own stream, so its results only depend on
+the seed, not on how many workers played them.
+"""
+
+import abc
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from game import *
+from eventlog import EventWriter
+from rng import GameRandom
+
+
+class Strategy(abc.ABC):
+    """Chooses moves for one seat of a headless game."""
+
+    name = "strategy"
+
+    @abc.abstractmethod
+    def choose_move(self, game: Game, player: Player, players: list[Player]) -> tuple[MoveType, Any]:
+        """Returns the move that `player` takes. Must be a move for which `game.is_valid_move` holds."""
+
+    def reseed(self, key: str):
+        """Restarts the strategy's own random stream, if it has one, as stream `key` of its seed, so reruns
+        repeat their decisions and parallel chunks do not share them. Strategies without one ignore this."""
+
+    def __str__(self):
+        return self.name
+
+
+class RollStrategy(Strategy):
+    """Always rolls a die."""
+
+    name = "roll"
+
+    def choose_move(self, game: Game, player: Player, players: list[Player]) -> tuple[MoveType, Any]:
+        return (MoveType.token, None)
+
+
+class RandomStrategy(Strategy):
+    """Rolls or takes a random top ticket with equal odds. Without a seed, it draws from the game's own random stream."""
+
+    name = "random"
+
+    def __init__(self, seed: int = None):
+        self.seed = seed
+        self.rng = random.Random(seed) if seed is not None else None
+
+    def reseed(self, key: str):
+        if self.seed is not None:
+            self.rng = GameRandom.stream(self.seed, key)
+
+    def choose_move(self, game: Game, player: Player, players: list[Player]) -> tuple[MoveType, Any]:
+        rng = self.rng or game.rng
+        tickets = list(game.ticket_status().values())
+        if tickets and rng.random() < 0.5:
+            return (MoveType.bet, rng.choice(tickets))
+        return (MoveType.token, None)
+
+
+class GreedyStrategy(Strategy):
+    """Takes the ticket with the highest EV when it beats the 1 coin a roll is worth, otherwise rolls."""
+
+    name = "greedy"
+
+    def __init__(self, margin: float = 0.0):
+        self.margin = margin
+
+    def choose_move(self, game: Game, player: Player, players: list[Player]) -> tuple[MoveType, Any]:
+        EVs = game.EV()
+        if EVs:
+            color = max(EVs, key=EVs.get)
+            if EVs[color] > 1 + self.margin:
+                return (MoveType.bet, game.ticket_status()[color])
+        return (MoveType.token, None)
+
+
+class GameResult:
+    """Outcome of one simulated game."""
+
+    def __init__(self, coins: list[int], legs: int, turns: int):
+        self.coins = coins
+        self.legs = legs
+        self.turns = turns
+
+    def winner(self) -> int:
+        """Returns the seat with the most coins, or None if the top score is tied."""
+        best = max(self.coins)
+        if self.coins.count(best) > 1:
+            return None
+        return self.coins.index(best)
+
+
+class Simulator:
+    """Plays complete games between a list of strategies, one per seat."""
+
+    def __init__(self, strategies: list[Strategy], seed: int = None, log: EventWriter = None):
+        """Creates a simulator for `len(strategies)` players. `seed` makes the dice reproducible.
+        Every event of every game is written to `log` if one is given."""
+        assert len(strategies) >= 2
+        self.strategies = strategies
+        self.seed = seed
+        self.rng = GameRandom(seed)
+        self.log = log
+
+    def use_stream(self, seed: int, number: int):
+        """Plays the next games on stream `number` of `seed`, for the dice and every strategy's own stream alike."""
+        self.rng = GameRandom.stream(seed, number)
+        for strategy in self.strategies:
+            strategy.reseed(f"{seed}/{number}")
+
+    def play_move(self, game: Game, player: Player, move: tuple[MoveType, Any], seat: int = 0) -> bool:
+        """Applies `move` for `player`, sitting at `seat`. Returns whether it ended the game."""
+        if not game.is_valid_move(move):
+            raise Exception(f"{player} chose an invalid move {move}.")
+
+        if move[0] == MoveType.bet:
+            undo = game.make_bet(move[1], player)
+            if self.log is not None:
+                self.log.bet(undo.ticket, seat)
+            return False
+
+        color, result = game.random_roll()
+        if self.log is not None:
+            self.log.roll(color, result, seat)
+        return game.make_roll(color, result, player).game_end
+
+    def finish_leg(self, game: Game, players: list[Player]):
+        game.finish_leg(players)
+        if self.log is not None:
+            self.log.settle()
+
+    def play_game(self) -> GameResult:
+        """Plays one game from a fresh board until a camel crosses the finish line."""
+        game = Game(self.rng)
+        players = [Player(f"{strategy} {i + 1}") for i, strategy in enumerate(self.strategies)]
+        if self.log is not None:
+            self.log.start(game, len(players))
+        legs = 0
+        turns = 0
+        current = 0
+        while True:
+            if game.is_finished_leg():
+                self.finish_leg(game, players)
+                legs += 1
+
+            player = players[current]
+            move = self.strategies[current].choose_move(game, player, players)
+            turns += 1
+            if self.play_move(game, player, move, current):
+                # the game ends mid-leg, so the bets on that leg still pay out
+                self.finish_leg(game, players)
+                legs += 1
+                if self.log is not None:
+                    self.log.end()
+                break
+
+            current = (current + 1) % len(players)
+
+        return GameResult([player.coins for player in players], legs, turns)
+
+    def run(self, num_games: int) -> dict:
+        """Plays `num_games` games and returns aggregate statistics, including games per second."""
+        if self.seed is not None:
+            self.rng.seed(self.seed)
+            for strategy in self.strategies:
+                strategy.reseed(str(self.seed))
+
+        start = time.perf_counter()
+        results = [self.play_game() for _ in range(num_games)]
+        return summarize(results, self.strategies, time.perf_counter() - start)
+
+
+def summarize(results: list[GameResult], strategies: list[Strategy], seconds: float) -> dict:
+    """Aggregates the results of a run of games into win counts and averages."""
+    num_games = len(results)
+    num_players = len(strategies)
+    wins = [0] * num_players
+    total_coins = [0] * num_players
+    ties = 0
+    legs = 0
+    turns = 0
+    for result in results:
+        winner = result.winner()
+        if winner is None:
+            ties += 1
+        else:
+            wins[winner] += 1
+        for i, coins in enumerate(result.coins):
+            total_coins[i] += coins
+        legs += result.legs
+        turns += result.turns
+
+    return {
+        "games": num_games,
+        "seconds": seconds,
+        "games_per_second": num_games / seconds if seconds > 0 else float("inf"),
+        "strategies": [str(strategy) for strategy in strategies],
+        "wins": wins,
+        "ties": ties,
+        "average_coins": [coins / num_games for coins in total_coins],
+        "average_legs": legs / num_games,
+        "average_turns": turns / num_games,
+    }
+
+
+def play_chunk(strategies: list[Strategy], seed: int, number: int, num_games: int) -> list[GameResult]:
+    """Plays chunk `number` of a parallel run: `num_games` games on stream `number` of `seed`."""
+    simulator = Simulator(strategies)
+    simulator.use_stream(seed, number)
+    return [simulator.play_game() for _ in range(num_games)]
+
+
+def run_parallel(
+    strategies: list[Strategy], num_games: int, seed: int, workers: int = None, chunk_size: int = 100
+) -> dict:
+    """Plays `num_games` games across a process pool of `workers` and returns the same statistics as `Simulator.run`.
+    Games are split into chunks of `chunk_size`, each on its own stream, so the results are the same for any `workers`."""
+    start = time.perf_counter()
+    chunks = [
+        (number, min(chunk_size, num_games - offset))
+        for number, offset in enumerate(range(0, num_games, chunk_size))
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_chunk, strategies, seed, number, size) for number, size in chunks]
+        results = [result for future in futures for result in future.result()]
+    return summarize(results, strategies, time.perf_counter() - start)
+
+
+STRATEGIES = {"roll": RollStrategy, "random": RandomStrategy, "greedy": GreedyStrategy}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulate headless games of Camel Up.")
+    parser.add_argument("strategies", nargs="+", choices=list(STRATEGIES), help="one strategy per seat")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--log", help="append every game event to this binary log file")
+    parser.add_argument("--workers", type=int, default=1, help="play the games across this many processes")
+    args = parser.parse_args()
+
+    strategies = [STRATEGIES[name]() for name in args.strategies]
+    if args.workers > 1:
+        if args.log:
+            parser.error("--log cannot be combined with --workers")
+        seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+        stats = run_parallel(strategies, args.games, seed, args.workers)
+    else:
+        log = EventWriter(args.log) if args.log else None
+        simulator = Simulator(strategies, seed=args.seed, log=log)
+        stats = simulator.run(args.games)
+        if log is not None:
+            log.close()
+    print(f"{stats['games']} games in {stats['seconds']:.2f}s ({stats['games_per_second']:.0f} games/s)")
+    for i, name in enumerate(stats["strategies"]):
+        print(f"seat {i + 1} ({name}): {stats['wins'][i]} wins, {stats['average_coins'][i]:.2f} coins on average")
+    print(f"ties: {stats['ties']}, legs per game: {stats['average_legs']:.2f}, turns per game: {stats['average_turns']:.2f}")
@@ -0,0 +1,54 @@
+import unittest
+from advisor import *
+from simulator import Simulator, RollStrategy
+
+
+class AdvisorTester(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+        self.players = [Player("A"), Player("B")]
+
+    def last_die(self):
+        """Red far ahead of a stack of the others, with only the red die left."""
+        self.game.blocks = [[] for _ in range(16)]
+        self.game.blocks[10] = [self.game.get_camel(Color.red)]
+        self.game.blocks[0] = [self.game.get_camel(color) for color in list(Color)[1:]]
+        self.game.available_dice = {color: 1 for color in Color}
+        self.game.available_dice[Color.red] = 0
+
+    def test_bets_on_sure_winner(self):
+        """Taking the red 5 is worth more than a roll when red cannot be caught."""
+        self.last_die()
+        move, value = Advisor(max_depth=2).best_move(self.game, self.players, 0)
+        self.assertEqual(move, (MoveType.bet, BettingTicket(Color.red, 5)))
+        self.assertGreater(value, 1)
+
+    def test_search_restores_game(self):
+        """Searching leaves the game and players exactly as they were, even when the search times out."""
+        blocks = [list(block) for block in self.game.blocks]
+        dice = dict(self.game.available_dice)
+        for advisor in [Advisor(max_depth=2), Advisor(max_depth=6, time_budget=0.2)]:
+            advisor.best_move(self.game, self.players, 0)
+            self.assertEqual(self.game.blocks, blocks)
+            self.assertEqual(self.game.available_dice, dice)
+            self.assertEqual(len(self.game.ticket_status()), 5)
+            self.assertEqual(self.game.tickets_left, {color: 4 for color in Color})
+            self.assertEqual([len(player.get_betting_cards()) for player in self.players], [0, 0])
+            self.assertEqual([player.get_tokens() for player in self.players], [0, 0])
+
+    def test_time_budget(self):
+        """With a deadline the advisor still returns a valid move."""
+        advisor = Advisor(max_depth=6, time_budget=0.2)
+        move, _ = advisor.best_move(self.game, self.players, 1)
+        self.assertTrue(self.game.is_valid_move(move))
+        self.assertLess(advisor.depth_reached, 6)
+        self.assertEqual(self.game.available_dice, {color: 0 for color in Color})
+        self.assertEqual([player.get_tokens() for player in self.players], [0, 0])
+
+    def test_plays_full_game(self):
+        """The advisor can drive a seat of the simulator."""
+        result = Simulator([ExpectimaxStrategy(max_depth=1), RollStrategy()], seed=4).play_game()
+        self.assertGreaterEqual(result.legs, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from random import Random
+from game import *
+import batch
+import packed
+from test_packed import random_board
+
+
+@unittest.skipIf(batch.np is None, "NumPy is not installed")
+class GameBatchTester(unittest.TestCase):
+    def setUp(self):
+        self.rng = Random(19)
+        self.games = []
+        for _ in range(50):
+            game = Game()
+            game.blocks = random_board(game, self.rng, spread=15)
+            self.games.append(game)
+        self.batch = batch.GameBatch.from_games(self.games, 2, seed=19)
+
+    def test_starting_boards(self):
+        """Fresh games put every camel on the first three squares with consistent stacks."""
+        games = batch.GameBatch(200, 3, seed=1)
+        self.assertTrue((games.squares < 3).all())
+        for k in range(200):
+            stacks = sorted(zip(games.squares[k], games.heights[k]))
+            self.assertEqual(len(set(stacks)), 5)
+            for square, height in stacks:
+                self.assertTrue(height == 0 or (square, height - 1) in stacks)
+
+    def test_move_matches_game(self):
+        """Vectorized moves leave every game on the board `Game.move_camel` would."""
+        camels = batch.np.array([self.rng.randrange(5) for _ in self.games])
+        distances = batch.np.array([self.rng.randint(1, 3) for _ in self.games])
+        game_end = self.batch.move(camels, distances, self.batch.rows)
+        for k, game in enumerate(self.games):
+            _, expected_end = game.move_camel(game.camels[camels[k]], int(distances[k]))
+            self.assertEqual(bool(game_end[k]), expected_end)
+            for i, camel in enumerate(game.camels):
+                self.assertEqual((self.batch.squares[k, i], self.batch.heights[k, i]), game.locate(camel.color))
+
+    def test_settle_matches_game(self):
+        """Settling pays out tokens and tickets exactly like `Game.finish_leg`."""
+        for k, game in enumerate(self.games):
+            players = [Player("a"), Player("b")]
+            for _ in range(4):
+                seat = self.rng.randrange(2)
+                color = self.rng.choice(list(game.ticket_status()))
+                self.batch.current[k] = seat
+                self.batch.bet(batch.np.array([game.camel_index(color)]), batch.np.array([k]))
+                game.make_bet(game.ticket_status()[color], players[seat])
+            self.batch.tokens[k] = [k % 3, 1]
+            players[0].token, players[1].token = k % 3, 1
+            game.finish_leg(players)
+            self.batch.settle(batch.np.array([k]))
+            self.assertEqual(list(self.batch.coins[k]), [player.coins for player in players])
+
+    def test_play(self):
+        """Every game runs to the end, with a camel across the finish line and settled legs."""
+        games = batch.GameBatch(300, 2, seed=5)
+        games.play(bet_probability=0.5)
+        self.assertTrue(games.finished.all())
+        self.assertTrue((games.squares.max(axis=1) == games.num_squares - 1).all())
+        self.assertTrue((games.legs >= 1).all())
+        self.assertFalse(games.dice_used.any())
+        winners = games.winners()
+        self.assertTrue(((winners >= -1) & (winners < 2)).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,20 @@
+import unittest
+from benchmark import *
+
+
+class BenchmarkTester(unittest.TestCase):
+    def test_compare_flags_regressions(self):
+        """Only cases slower than the threshold are reported."""
+        baseline = {"results": {"a": {"seconds_per_call": 1.0}, "b": {"seconds_per_call": 1.0}}}
+        results = {"results": {"a": {"seconds_per_call": 1.1}, "b": {"seconds_per_call": 1.5}, "c": {"seconds_per_call": 9.0}}}
+        regressions = compare(results, baseline, 0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("b:"))
+
+    def test_run_case(self):
+        """A quick run produces a timing for the requested case."""
+        results = run_benchmarks(["get_winning_camels"], min_time=0.001, repeat=1)
+        self.assertGreater(results["results"]["get_winning_camels"]["seconds_per_call"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
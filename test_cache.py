@@ -0,0 +1,93 @@
+import unittest
+from game import *
+from cache import LegCache, canonical_key
+
+
+class LegCacheTester(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+        Game.leg_cache = LegCache(capacity=8)
+
+    def tearDown(self):
+        Game.leg_cache = LegCache()
+
+    def place_all(self, square: int):
+        """Stacks every camel on one square."""
+        self.game.blocks = [[] for _ in range(16)]
+        for camel in self.game.camels:
+            self.game.blocks[square].append(camel)
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        cache = LegCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (2, 1, 2))
+
+    def test_shifted_boards_share_entry(self):
+        """The same relative position further up the track hits the cache."""
+        self.game.available_dice[Color.red] = 1
+        self.game.available_dice[Color.blue] = 2
+        self.place_all(0)
+        first_EV = self.game.EV()
+        self.place_all(4)
+        self.assertEqual(self.game.EV(), first_EV)
+        self.assertEqual((Game.leg_cache.hits, Game.leg_cache.misses), (1, 1))
+
+    def test_no_shift_near_finish(self):
+        """Boards where the finish line is in reach are not normalized."""
+        self.place_all(12)
+        state = self.game.to_packed()
+        key = canonical_key(state, self.game.remaining_dice(), 16, 5, (1, 2, 3))
+        self.assertEqual(key[0], state)
+
+    def test_ticket_take_reprices(self):
+        """Taking a ticket reprices the EVs without looking the outcomes up again; rolling does look them up."""
+        Game.rank_cache = None
+        try:
+            before = self.game.EV()
+            self.game.make_bet(BettingTicket(Color.red, 5))
+            after = self.game.EV()
+            self.assertEqual((Game.leg_cache.hits, Game.leg_cache.misses), (0, 1))
+            self.assertLess(after[Color.red], before[Color.red])
+            self.assertEqual(after[Color.blue], before[Color.blue])
+
+            self.game.make_roll(Color.blue, 1)
+            self.game.EV()
+            self.assertEqual(Game.leg_cache.misses, 2)
+
+            # boards edited directly are noticed too
+            self.place_all(0)
+            self.game.EV()
+            self.assertEqual(Game.leg_cache.misses, 3)
+        finally:
+            Game.rank_cache = LegCache(1024)
+
+    def test_camel_count_in_key(self):
+        """Games with different numbers of camels never share an entry, even when their boards pack the same."""
+        three = Game(num_squares=10, dice_range=(1, 2), colors=[Color.red, Color.blue, Color.green])
+        four = Game(num_squares=10, dice_range=(1, 2), colors=[Color.red, Color.blue, Color.green, Color.yellow])
+        for game in [three, four]:
+            game.blocks = [[] for _ in range(10)]
+            for square, color in [(7, Color.red), (8, Color.blue), (9, Color.green)]:
+                game.blocks[square].append(game.get_camel(color))
+        four.blocks[0].append(four.get_camel(Color.yellow))
+        four.available_dice[Color.yellow] = 1
+        self.assertEqual(three.to_packed(), four.to_packed())
+
+        three.EV()
+        self.assertEqual(set(four.EV()), {Color.red, Color.blue, Color.green, Color.yellow})
+
+    def test_disabled_cache(self):
+        """EV still works with the cache turned off."""
+        self.place_all(0)
+        cached = self.game.EV()
+        Game.leg_cache = None
+        self.assertEqual(self.game.EV(), cached)
+
+if __name__ == '__main__':
+    unittest.main()
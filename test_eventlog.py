@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from eventlog import *
+from simulator import Simulator, RandomStrategy, RollStrategy
+
+
+class EventLogTester(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".camlog")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_replay_matches_simulation(self):
+        """Replaying a logged game reproduces its final coins."""
+        with EventWriter(self.path, buffer_size=64) as log:
+            simulator = Simulator([RandomStrategy(seed=1), RollStrategy()], seed=7, log=log)
+            results = [simulator.play_game() for _ in range(3)]
+
+        with EventReader(self.path) as reader:
+            self.assertEqual(len(reader.game_starts()), 3)
+            self.assertEqual(reader.count(END), 3)
+            self.assertEqual(reader.count(ROLL) + reader.count(BET), sum(result.turns for result in results))
+            for i, result in enumerate(results):
+                game, players = reader.replay(i)
+                self.assertEqual([player.coins for player in players], result.coins)
+                self.assertEqual(len(game.blocks[game.num_squares - 1]) > 0, True)
+
+    def test_appends_to_existing_log(self):
+        """Reopening a log appends after the existing records."""
+        game = Game()
+        with EventWriter(self.path) as log:
+            log.start(game, 2)
+        with EventWriter(self.path) as log:
+            with self.assertRaises(Exception):
+                log.roll(Color.blue, 3, 1)
+            log.start(game, 3)
+            log.roll(Color.blue, 3, 1)
+        with EventReader(self.path) as reader:
+            records = list(reader.records())
+        self.assertEqual(records[0], (START, 2, 0, 0, game.to_packed()))
+        self.assertEqual(records[1][:4], (RULES, 16, 1, 3))
+        self.assertEqual(records[2], (START, 3, 0, 0, game.to_packed()))
+        self.assertEqual(records[4], (ROLL, COLORS.index(Color.blue), 3, 1, 0))
+
+    def test_replays_variants(self):
+        """Variant games come back with their own track, dice and camels."""
+        colors = [Color.red, Color.blue, Color.green, HouseColor.white]
+        game = Game(num_squares=10, dice_range=(1, 2), colors=colors)
+        game.blocks = [[] for _ in range(10)]
+        game.blocks[0] = [game.get_camel(Color.red), game.get_camel(HouseColor.white)]
+        game.blocks[2] = [game.get_camel(Color.blue), game.get_camel(Color.green)]
+        with EventWriter(self.path) as log:
+            log.start(game, 2)
+            log.roll(HouseColor.white, 2, 0)
+            log.bet(BettingTicket(Color.green, 5), 1)
+        game.make_roll(HouseColor.white, 2)
+
+        with EventReader(self.path) as reader:
+            replayed, players = reader.replay(0)
+        self.assertEqual((replayed.num_squares, replayed.faces, replayed.colors), (10, (1, 2), colors))
+        self.assertEqual(replayed.blocks, game.blocks)
+        self.assertEqual(players[1].get_betting_cards(), [BettingTicket(Color.green, 5)])
+
+    def test_replays_logs_without_rules(self):
+        """Logs written before the rules were recorded replay under the standard rules."""
+        game = Game()
+        with open(self.path, "wb") as f:
+            f.write(MAGIC + RECORD.pack(START, 2, 0, 0, game.to_packed()) + RECORD.pack(ROLL, 0, 3, 0, 0))
+        game.make_roll(Color.red, 3)
+        with EventReader(self.path) as reader:
+            replayed, _ = reader.replay(0)
+        self.assertEqual(replayed.blocks, game.blocks)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a log at all")
+        with self.assertRaises(Exception):
+            EventReader(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,11 @@
 import unittest
+from random import Random
 from game import *
 
 class GameTester(unittest.TestCase):
     def setUp(self):
         self.game = Game()
+        self.rng = Random(2024)
 
     def test_dice_length(self):
         """Make sure we have a die for each color."""
@@ -38,6 +40,20 @@ class GameTester(unittest.TestCase):
         correct[Color.red] = BettingTicket(Color.red, 3)
         self.assertEqual(tickets, correct)
 
+    def test_only_top_ticket(self):
+        """Only the top ticket of a color can be taken, until the tent runs out."""
+        self.assertFalse(self.game.is_valid_move((MoveType.bet, BettingTicket(Color.red, 3))))
+        with self.assertRaises(Exception):
+            self.game.remove_ticket(BettingTicket(Color.red, 2))
+        for value in [5, 3, 2, 2]:
+            self.assertTrue(self.game.is_valid_move((MoveType.bet, BettingTicket(Color.red, value))))
+            self.game.remove_ticket(BettingTicket(Color.red, value))
+        self.assertNotIn(Color.red, self.game.ticket_status())
+        self.assertEqual(self.game.available_betting_tickets[Color.red], [])
+
+        self.game.finish_leg([])
+        self.assertEqual(self.game.ticket_status()[Color.red], BettingTicket(Color.red, 5))
+
     def test_move_unstacked_camel(self):
         """Move a unstacked camel forward by 1 square."""
         self.game.blocks = [[] for _ in range(16)]
@@ -148,5 +164,49 @@ class GameTester(unittest.TestCase):
         self.game.move_camel(self.game.camels[-2], 9)
         self.assertEqual(self.game.EV()[self.game.camels[-2].get_color()], 1)
 
+    def test_position_index(self):
+        """The camel position index stays consistent with the board through moves."""
+        for _ in range(30):
+            camel = self.game.camels[self.rng.randint(0, 4)]
+            self.game.move_camel(camel, self.rng.randint(1, 3))
+            for square, block in enumerate(self.game.blocks):
+                for height, board_camel in enumerate(block):
+                    self.assertEqual(self.game.positions[board_camel.color], (square, height))
+            self.assertEqual(self.game.locate(camel.color), self.game.positions[camel.color])
+
+    def test_position_index_after_board_edit(self):
+        """Editing `blocks` directly is picked up by the index."""
+        self.game.blocks = [[] for _ in range(16)]
+        self.game.blocks[4] = [self.game.get_camel(color) for color in Color]
+        self.assertEqual(self.game.locate(Color.purple), (4, 4))
+        self.assertEqual(self.game.get_winning_camels(), (self.game.get_camel(Color.purple), self.game.get_camel(Color.yellow)))
+
+    def snapshot(self, players: list[Player]) -> tuple:
+        """Everything make/unmake must restore, in comparable form."""
+        return (
+            [[camel.color for camel in block] for block in self.game.blocks],
+            dict(self.game.positions),
+            dict(self.game.available_dice),
+            {color: [ticket.value for ticket in tickets] for color, tickets in self.game.available_betting_tickets.items()},
+            [(player.token, list(player.betting_cards)) for player in players],
+        )
+
+    def test_make_unmake(self):
+        """Unmaking a sequence of rolls and bets in reverse restores the exact prior state."""
+        players = [Player("A"), Player("B")]
+        before = self.snapshot(players)
+        undos = []
+        for turn in range(5):
+            player = players[turn % 2]
+            undos.append(self.game.make_bet(self.game.ticket_status()[list(Color)[turn % 3]], player))
+            color = self.game.dice_status()[1][0][0]
+            undos.append(self.game.make_roll(color, self.rng.randint(1, 3), player))
+        self.assertTrue(self.game.is_finished_leg())
+        self.assertEqual(len(players[0].get_betting_cards()) + len(players[1].get_betting_cards()), 5)
+
+        for undo in reversed(undos):
+            self.game.unmake(undo)
+        self.assertEqual(self.snapshot(players), before)
+
 if __name__ == '__main__':
     unittest.main()
@@ -29,5 +29,15 @@ class HelperTest(unittest.TestCase):
         self.assertEqual(Camel(Color.red), Camel(Color.red))
         self.assertNotEqual(Camel(Color.green), Camel(Color.blue))
 
+    def test_interned(self):
+        """Camels and tickets are shared, hashable and immutable."""
+        self.assertIs(Camel(Color.red), Camel(Color.red))
+        self.assertIs(BettingTicket(Color.blue, 3), BettingTicket(Color.blue, 3))
+        self.assertEqual(len({Camel(Color.red), Camel(Color.red), BettingTicket(Color.red, 2)}), 2)
+        with self.assertRaises(AttributeError):
+            Camel(Color.red).color = Color.blue
+        with self.assertRaises(AttributeError):
+            BettingTicket(Color.red, 2).value = 5
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import itertools
+from random import Random
+from game import *
+import leg
+from test_packed import random_board
+
+
+class LegTester(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+        self.rng = Random(11)
+
+    def brute_force(self) -> tuple[dict, dict, int]:
+        """Tallies leg outcomes the slow way, replaying every dice order and roll vector with `expected_winner`."""
+        colors = [color for color, result in self.game.dice_status()[1]]
+        first_place = {color: 0 for color in Color}
+        second_place = {color: 0 for color in Color}
+        combos = 0
+        for order in itertools.permutations(colors):
+            for rolls in itertools.product([1, 2, 3], repeat=len(colors)):
+                first, second = self.game.expected_winner(self.game.blocks, rolls, order)
+                first_place[first.color] += 1
+                second_place[second.color] += 1
+                combos += 1
+        return first_place, second_place, combos
+
+    def test_matches_brute_force(self):
+        """The recursive engine gives exactly the same tallies as full enumeration."""
+        for num_dice in range(0, 4):
+            self.game.blocks = random_board(self.game, self.rng, spread=14)
+            used = self.rng.sample(list(Color), 5 - num_dice)
+            self.game.available_dice = {color: (1 if color in used else 0) for color in Color}
+            self.assertEqual(self.game.leg_outcomes(), self.brute_force())
+
+    def test_full_leg_combos(self):
+        """With all 5 dice left there are 5! * 3^5 outcomes."""
+        first_place, second_place, combos = self.game.leg_outcomes()
+        self.assertEqual(combos, 120 * 243)
+        self.assertEqual(sum(first_place.values()), combos)
+        self.assertEqual(sum(second_place.values()), combos)
+
+    @unittest.skipIf(leg.np is None, "NumPy is not installed")
+    def test_numpy_matches_recursive(self):
+        """The vectorized engine gives the same tallies as the recursive one."""
+        num_camels = len(self.game.camels)
+        for num_dice in range(0, 6):
+            self.game.blocks = random_board(self.game, self.rng, spread=14)
+            remaining = (1 << num_dice) - 1
+            args = (self.game.to_packed(), remaining, self.game.num_squares, num_camels, (1, 2, 3))
+            self.assertEqual(leg.leg_ranks_numpy(*args), leg.leg_ranks(*args))
+
+    def test_parallel_matches_in_process(self):
+        """Splitting the leg across worker processes gives the same tallies."""
+        num_camels = len(self.game.camels)
+        args = (self.game.to_packed(), self.game.remaining_dice(), self.game.num_squares, num_camels, (1, 2, 3))
+        try:
+            parallel = leg.leg_ranks_parallel(*args, workers=2, threshold=2)
+        finally:
+            leg.shutdown_pools()
+        self.assertEqual(parallel, leg.leg_ranks(*args))
+
+    def test_ranks_match_brute_force(self):
+        """Rank tallies and expected squares match replaying every dice order and roll vector, wherever the board is."""
+        for spread in [3, 14]:
+            self.game.blocks = random_board(self.game, self.rng, spread=spread)
+            used = self.rng.sample(list(Color), 2)
+            self.game.available_dice = {color: (1 if color in used else 0) for color in Color}
+            colors = [color for color, result in self.game.dice_status()[1]]
+
+            ranks = {color: [0] * 5 for color in Color}
+            squares = {color: 0 for color in Color}
+            combos = 0
+            for order in itertools.permutations(colors):
+                for rolls in itertools.product([1, 2, 3], repeat=len(colors)):
+                    game = Game.from_packed(self.game.to_packed())
+                    for color, roll in zip(order, rolls):
+                        game.move_camel(game.get_camel(color), roll)
+                    for rank, camel in enumerate(game.get_ranking()):
+                        ranks[camel.color][rank] += 1
+                        squares[camel.color] += game.locate(camel.color)[0]
+                    combos += 1
+
+            probabilities, expected_squares = self.game.rank_probabilities()
+            for color in Color:
+                self.assertEqual(probabilities[color], [count / combos for count in ranks[color]])
+                self.assertAlmostEqual(expected_squares[color], squares[color] / combos)
+
+    def test_ranks_agree_with_leg_outcomes(self):
+        """First and second place of the rank tallies are the leg outcome tallies, and EV can reuse them."""
+        cache = Game.leg_cache
+        Game.leg_cache = None
+        try:
+            expected = self.game.EV()
+            first_place, second_place, combos = self.game.leg_outcomes()
+            probabilities, _ = self.game.rank_probabilities()
+            for color in Color:
+                self.assertEqual(probabilities[color][0], first_place[color] / combos)
+                self.assertEqual(probabilities[color][1], second_place[color] / combos)
+                self.assertAlmostEqual(sum(probabilities[color]), 1)
+            self.assertEqual(self.game.EV(), expected)
+        finally:
+            Game.leg_cache = cache
+
+    def test_one_enumeration(self):
+        """EV fills the rank cache, so asking for rank probabilities afterwards enumerates nothing new."""
+        caches = Game.leg_cache, Game.rank_cache
+        Game.leg_cache, Game.rank_cache = LegCache(), LegCache()
+        try:
+            self.game.EV()
+            self.game.rank_probabilities()
+            self.assertEqual((Game.rank_cache.hits, Game.rank_cache.misses), (1, 1))
+            self.game.last_outcomes = None
+            self.game.EV()
+            self.assertEqual(Game.rank_cache.misses, 1)
+        finally:
+            Game.leg_cache, Game.rank_cache = caches
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from game import *
+from legtable import *
+
+
+class LegTableTester(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".table")
+        os.close(handle)
+        self.game = Game()
+        # only two dice left keeps the table quick to build
+        self.game.available_dice = {color: 1 for color in Color}
+        self.game.available_dice[Color.red] = 0
+        self.game.available_dice[Color.purple] = 0
+
+    def tearDown(self):
+        Game.leg_table = None
+        os.remove(self.path)
+
+    def test_start_of_leg_boards(self):
+        """5 camels over 3 squares can be arranged in 5! * C(7, 2) ways."""
+        boards = set(start_of_leg_boards(5, 3))
+        self.assertEqual(len(boards), 120 * 21)
+        self.assertIn(self.game.to_packed(), boards)
+
+    def test_lookup_matches_computation(self):
+        """Boards in the table give the same EVs as computing them, and misses fall back to computing."""
+        remaining = self.game.remaining_dice()
+        boards = [(state, remaining) for state in list(start_of_leg_boards(5, 3))[:40]]
+        boards.append((self.game.to_packed(), remaining))
+        # boards that only differ by a shift along the track share an entry
+        self.assertLessEqual(build(self.path, boards), 41)
+
+        expected = self.game.EV()
+        Game.leg_table = LegTable.open(self.path)
+        self.game.last_outcomes = None
+        try:
+            self.assertEqual(self.game.EV(), expected)
+            self.assertEqual(Game.leg_table.hits, 1)
+
+            self.game.move_camel(self.game.camels[0], 9)
+            self.assertIsNotNone(self.game.EV())
+            self.assertEqual(Game.leg_table.misses, 1)
+        finally:
+            Game.leg_table.close()
+
+if __name__ == '__main__':
+    unittest.main()
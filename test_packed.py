@@ -0,0 +1,68 @@
+import unittest
+from random import Random
+from game import *
+import packed
+
+
+def random_board(game: Game, rng: Random, spread: int = 6) -> list[list[Camel]]:
+    """Builds a random board with every camel of `game` somewhere on the first `spread` squares."""
+    blocks = [[] for _ in range(game.num_squares)]
+    camels = list(game.camels)
+    rng.shuffle(camels)
+    for camel in camels:
+        blocks[rng.randint(0, spread - 1)].append(camel)
+    return blocks
+
+
+class PackedTester(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+        self.rng = Random(2024)
+
+    def test_round_trip(self):
+        """Packing and unpacking gives back the same board."""
+        for _ in range(50):
+            board = random_board(self.game, self.rng)
+            self.game.blocks = board
+            state = self.game.to_packed()
+            self.assertEqual(Game.from_packed(state).blocks, board)
+
+    def test_fields(self):
+        """Check the square and height of a stacked camel."""
+        self.game.blocks = [[] for _ in range(16)]
+        self.game.blocks[3] = [self.game.get_camel(Color.red), self.game.get_camel(Color.blue)]
+        for color in [Color.green, Color.yellow, Color.purple]:
+            self.game.blocks[0].append(self.game.get_camel(color))
+        state = self.game.to_packed()
+        blue = self.game.camel_index(Color.blue)
+        self.assertEqual(packed.square_of(state, blue), 3)
+        self.assertEqual(packed.height_of(state, blue), 1)
+
+    def test_move_matches_game(self):
+        """The packed move kernel agrees with `Game.move_camel` on random boards."""
+        num_camels = len(self.game.camels)
+        for _ in range(200):
+            self.game.blocks = random_board(self.game, self.rng, spread=14)
+            state = self.game.to_packed()
+            camel = self.rng.choice(self.game.camels)
+            distance = self.rng.randint(1, 3)
+
+            final_square, game_end = self.game.move_camel(camel, distance)
+            new_state, packed_square, packed_end = packed.move(
+                state, self.game.camel_index(camel.color), distance, self.game.num_squares, num_camels
+            )
+            self.assertEqual(new_state, self.game.to_packed())
+            self.assertEqual((packed_square, packed_end), (final_square, game_end))
+
+    def test_winners_match_game(self):
+        """The packed leader query agrees with `Game.get_winning_camels`."""
+        for _ in range(50):
+            self.game.blocks = random_board(self.game, self.rng)
+            first, second = packed.winners(self.game.to_packed(), len(self.game.camels))
+            self.assertEqual(
+                (self.game.camels[first], self.game.camels[second]),
+                self.game.get_winning_camels(),
+            )
+
+if __name__ == '__main__':
+    unittest.main()
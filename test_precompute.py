@@ -0,0 +1,38 @@
+import unittest
+from game import *
+from cache import LegCache
+from precompute import Precomputer
+
+
+class PrecomputeTester(unittest.TestCase):
+    def setUp(self):
+        Game.leg_cache = LegCache()
+        self.game = Game()
+        self.precomputer = Precomputer()
+
+    def tearDown(self):
+        self.precomputer.shutdown()
+        Game.leg_cache = LegCache()
+
+    def test_next_roll_is_cached(self):
+        """After precomputing, EV is a cache hit for the current position and after any roll."""
+        self.precomputer.start(self.game)
+        self.assertTrue(self.precomputer.wait(timeout=30))
+
+        hits = Game.leg_cache.hits
+        self.game.EV()
+        color, result = self.game.generate_random_roll()
+        self.game.move_camel(self.game.get_camel(color), result)
+        self.game.EV()
+        self.assertEqual(Game.leg_cache.hits, hits + 2)
+
+    def test_restart_cancels_stale_work(self):
+        """Starting again for a new position drops the queued work for the old one."""
+        self.precomputer.start(self.game)
+        stale = list(self.precomputer.futures)
+        self.precomputer.start(self.game)
+        self.assertTrue(all(future not in self.precomputer.futures for future in stale))
+        self.assertTrue(self.precomputer.wait(timeout=30))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from game import *
+import profiling
+
+
+class ProfilingTester(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+
+    def test_counts_calls(self):
+        """Calls made inside the block are counted and timed."""
+        game = Game()
+        with profiling.profile() as profiler:
+            game.EV()
+            game.move_camel(game.camels[0], 1)
+            game.move_camel(game.camels[0], 1)
+        snapshot = profiler.snapshot()
+        self.assertEqual(snapshot["EV"]["calls"], 1)
+        self.assertEqual(snapshot["ticket_status"]["calls"], 1)
+        self.assertEqual(snapshot["move_camel"]["calls"], 2)
+        self.assertGreater(snapshot["EV"]["seconds"], 0)
+
+    def test_disabled_restores_methods(self):
+        """Leaving the block puts the original methods back on Game."""
+        original = Game.move_camel
+        with profiling.profile():
+            self.assertIsNot(Game.move_camel, original)
+            self.assertTrue(profiling.is_enabled())
+        self.assertIs(Game.move_camel, original)
+        self.assertFalse(profiling.is_enabled())
+
+    def test_nested_profiles(self):
+        """An outer profiler also sees calls made inside an inner block."""
+        game = Game()
+        with profiling.profile() as outer:
+            game.dice_status()
+            with profiling.profile() as inner:
+                game.dice_status()
+        self.assertEqual(outer.snapshot()["dice_status"]["calls"], 2)
+        self.assertEqual(inner.snapshot()["dice_status"]["calls"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
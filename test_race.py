@@ -0,0 +1,43 @@
+import unittest
+from race import *
+from rng import GameRandom
+
+
+class RaceTester(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+
+    def test_probabilities_sum_to_one(self):
+        """Exactly one camel wins and one finishes last in every rollout."""
+        estimate = estimate_race(self.game, target_width=0.2, seed=1)
+        self.assertAlmostEqual(sum(estimate.win.values()), 1)
+        self.assertAlmostEqual(sum(estimate.lose.values()), 1)
+        self.assertGreater(estimate.samples, 0)
+
+    def test_runaway_leader(self):
+        """A camel one square from the line with every other camel far behind is a sure winner."""
+        self.game.blocks = [[] for _ in range(16)]
+        self.game.blocks[15] = [self.game.get_camel(Color.green)]
+        self.game.blocks[0] = [self.game.get_camel(color) for color in Color if color != Color.green]
+        estimate = estimate_race(self.game, target_width=0.05, time_budget=5, seed=2)
+        self.assertEqual(estimate.win[Color.green], 1)
+        self.assertEqual(estimate.lose[Color.green], 0)
+        self.assertTrue(estimate.converged)
+        self.assertLessEqual(estimate.width, 0.05)
+
+    def test_keeps_dice_stream(self):
+        """Estimating for however long never changes the dice a seeded game rolls next."""
+        rolls = []
+        for time_budget in [0.01, 0.1]:
+            game = Game(GameRandom(5))
+            estimate_race(game, target_width=0, time_budget=time_budget)
+            rolls.append([game.generate_random_roll() for _ in range(3)])
+        self.assertEqual(rolls[0], rolls[1])
+
+    def test_seed_is_reproducible(self):
+        first = estimate_race(self.game, target_width=0.5, seed=3)
+        second = estimate_race(self.game, target_width=0.5, seed=3)
+        self.assertEqual(first.win, second.win)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import os
+import unittest
+from renderer import *
+
+
+class RendererTester(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.renderer = Renderer(self.stream)
+        self.renderer.clear()
+
+    def written(self) -> str:
+        output = self.stream.getvalue()
+        self.stream.seek(0)
+        self.stream.truncate()
+        return output
+
+    def test_only_changed_lines_are_redrawn(self):
+        """The second frame only rewrites the line that changed."""
+        self.renderer.draw(["one", "two", "three"])
+        self.written()
+        self.renderer.draw(["one", "TWO", "three"])
+        output = self.written()
+        self.assertIn(move_to(1) + "TWO", output)
+        self.assertNotIn("one", output)
+        self.assertNotIn("three", output)
+        self.assertNotIn(CLEAR_SCREEN, output)
+
+    def test_shorter_frame_erases_leftovers(self):
+        """Lines below a shorter frame are erased."""
+        self.renderer.draw(["one", "two", "three"])
+        self.written()
+        self.renderer.draw(["one"])
+        self.assertTrue(self.written().endswith(move_to(1) + CLEAR_BELOW))
+
+    def test_unknown_screen_is_redrawn_in_full(self):
+        self.renderer.draw(["one"])
+        self.renderer.forget()
+        self.written()
+        self.renderer.draw(["one"])
+        self.assertIn(CLEAR_SCREEN + "one", self.written())
+
+    def test_fragments_are_cached(self):
+        """Colored fragments are built once per camel."""
+        first = self.renderer.camel(Camel(Color.red))
+        self.assertIs(self.renderer.camel(Camel(Color.red)), first)
+        self.assertEqual(self.renderer.stack([Camel(Color.red), Camel(Color.blue)]), str([Camel(Color.red), Camel(Color.blue)]))
+
+    def test_tall_frame_stays_incremental(self):
+        """A frame taller than the terminal is shortened to fit above the prompt instead of clearing the screen."""
+        lines = [f"line {i}" if i % 3 else "" for i in range(46)]
+        lines[-1] = "last"
+        previous = os.environ.get("LINES")
+        os.environ["LINES"] = "24"
+        try:
+            self.renderer.draw(lines, reserve=8)
+            self.written()
+            lines[4] = "changed"
+            self.renderer.draw(lines, reserve=8)
+            output = self.written()
+        finally:
+            if previous is None:
+                del os.environ["LINES"]
+            else:
+                os.environ["LINES"] = previous
+        self.assertNotIn(CLEAR_SCREEN, output)
+        self.assertIn("changed", output)
+        self.assertEqual(len(self.renderer.previous), 15)
+        self.assertIn("more lines", self.renderer.previous[-1])
+
+    def test_fit_drops_blank_lines_first(self):
+        lines = ["a", "", "", "b", "", "c"]
+        self.assertEqual(self.renderer.fit(lines, 6), lines)
+        self.assertEqual(self.renderer.fit(lines, 5), ["a", "", "b", "", "c"])
+        self.assertEqual(self.renderer.fit(lines, 3), ["a", "b", "c"])
+        self.assertEqual(self.renderer.fit(lines, 2), ["a", "... 2 more lines, enlarge the terminal to see them"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from collections import Counter
+import pickle
+from game import *
+from rng import GameRandom
+
+
+class GameRandomTester(unittest.TestCase):
+    def test_streams(self):
+        """The same seed and stream number repeat exactly, and different stream numbers differ."""
+        first = [GameRandom.stream(7, 0).random() for _ in range(3)]
+        self.assertEqual(first, [GameRandom.stream(7, 0).random() for _ in range(3)])
+        self.assertNotEqual(GameRandom.stream(7, 0).random(), GameRandom.stream(7, 1).random())
+
+    def test_roll_is_uniform(self):
+        """Every (die, face) pair comes up about equally often."""
+        rng = GameRandom(1, block_size=64)
+        colors = [Color.red, Color.blue, Color.purple]
+        counts = Counter(rng.roll(colors, 1, 3) for _ in range(9000))
+        self.assertEqual(len(counts), 9)
+        for count in counts.values():
+            self.assertAlmostEqual(count / 9000, 1 / 9, delta=0.02)
+
+    def test_reseed_and_pickle(self):
+        """Reseeding discards pre-generated draws, and pickled streams carry on where they left off."""
+        rng = GameRandom(3)
+        colors = list(Color)
+        rolls = [rng.roll(colors, 1, 3) for _ in range(5)]
+        rng.seed(3)
+        self.assertEqual([rng.roll(colors, 1, 3) for _ in range(5)], rolls)
+
+        copy = pickle.loads(pickle.dumps(rng))
+        self.assertEqual([copy.roll(colors, 1, 3) for _ in range(5)], [rng.roll(colors, 1, 3) for _ in range(5)])
+
+    def test_games_are_reproducible(self):
+        """Two games on equally seeded streams start on the same board and roll the same dice."""
+        games = [Game(GameRandom(12)), Game(GameRandom(12))]
+        self.assertEqual(games[0].to_packed(), games[1].to_packed())
+        for _ in range(5):
+            self.assertEqual(games[0].generate_random_roll(), games[1].generate_random_roll())
+
+if __name__ == '__main__':
+    unittest.main()
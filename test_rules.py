@@ -0,0 +1,108 @@
+import unittest
+import itertools
+from game import *
+from rng import GameRandom
+
+
+class RulesTester(unittest.TestCase):
+    def setUp(self):
+        self.colors = [Color.red, Color.blue, Color.green]
+        self.game = Game(num_squares=10, dice_range=(1, 2), colors=self.colors)
+
+    def test_house_rules(self):
+        """A variant game only has the chosen camels, dice and tickets, on a shorter track."""
+        self.assertEqual(len(self.game.blocks), 10)
+        self.assertEqual([camel.color for camel in self.game.camels], self.colors)
+        self.assertEqual(set(self.game.available_dice), set(self.colors))
+        self.assertEqual(set(self.game.ticket_status()), set(self.colors))
+        for _ in range(3):
+            color, result = self.game.generate_random_roll()
+            self.assertIn(color, self.colors)
+            self.assertIn(result, [1, 2])
+        self.assertTrue(self.game.is_finished_leg())
+
+    def test_pyramid_follows_dice(self):
+        """Rolls only come from the dice still in the pyramid, however the dice were changed."""
+        self.game.available_dice[Color.red] = 2
+        self.assertEqual(self.game.available_dice.in_pyramid, [Color.blue, Color.green])
+        color, result = self.game.generate_random_roll()
+        self.assertIn(color, [Color.blue, Color.green])
+        self.assertEqual(self.game.available_dice.in_pyramid, [c for c in [Color.blue, Color.green] if c != color])
+        self.game.finish_leg([])
+        self.assertEqual(self.game.available_dice.in_pyramid, self.colors)
+
+    def test_exact_variant_EV(self):
+        """Exact EVs of a variant match replaying every dice order and roll vector."""
+        first_place = {color: 0 for color in self.colors}
+        second_place = {color: 0 for color in self.colors}
+        combos = 0
+        for order in itertools.permutations(self.colors):
+            for rolls in itertools.product([1, 2], repeat=3):
+                first, second = self.game.expected_winner(self.game.blocks, rolls, order)
+                first_place[first.color] += 1
+                second_place[second.color] += 1
+                combos += 1
+
+        evaluation = self.game.evaluate()
+        self.assertEqual((evaluation.method, evaluation.error, evaluation.outcomes), ("exact", 0.0, combos))
+        self.assertEqual(evaluation.EVs, self.game.price_tickets(first_place, second_place, combos))
+
+    def test_sampled_EV(self):
+        """When the outcome space does not fit the time budget, EVs are sampled to within the reported error."""
+        game = Game(GameRandom(24))
+        exact = Game.from_packed(game.to_packed()).evaluate(method="exact")
+        # pretend enumeration is slow, so the full leg does not fit the budget
+        game.ev_outcome_rate = 1
+        estimate = game.evaluate(time_budget=5, target_error=0.05)
+        self.assertEqual(estimate.method, "sampled")
+        self.assertGreater(estimate.samples, 0)
+        self.assertLessEqual(estimate.error, 0.05)
+        for color in Color:
+            self.assertAlmostEqual(estimate.EVs[color], exact.EVs[color], delta=2 * estimate.error)
+
+    def test_sampling_keeps_dice(self):
+        """Sampling for however long the budget allows never changes the dice a seeded game rolls next."""
+        rolls = []
+        for time_budget in [0.01, 0.2]:
+            game = Game(GameRandom(7))
+            game.ev_outcome_rate = 1
+            game.evaluate(time_budget=time_budget, target_error=0)
+            rolls.append([game.generate_random_roll() for _ in range(3)])
+        self.assertEqual(rolls[0], rolls[1])
+
+    def test_eight_camels(self):
+        """Variants can race the three house camels as well, up to the eight a packed board holds."""
+        game = Game(colors=list(Color) + list(HouseColor), dice_range=(1, 2))
+        self.assertEqual(len(game.camels), 8)
+        self.assertEqual(Game.from_packed(game.to_packed(), colors=game.colors).blocks, game.blocks)
+        self.assertEqual(game.ticket_status()[HouseColor.cyan], BettingTicket(HouseColor.cyan, 5))
+
+        # 8! * 2^8 outcomes is far too many to enumerate, so the EVs are sampled
+        evaluation = game.evaluate(time_budget=0.2)
+        self.assertEqual(evaluation.method, "sampled")
+        self.assertEqual(set(evaluation.EVs), set(game.colors))
+
+        # with only two dice left the leg is enumerated exactly again
+        for color in game.colors[2:]:
+            game.available_dice[color] = 1
+        self.assertEqual(game.evaluate().method, "exact")
+        with self.assertRaises(Exception):
+            Game(colors=list(Color) + list(HouseColor) + [Color.red])
+
+    def test_track_limit(self):
+        """Tracks longer than the packed board can hold, or too short to start on, are rejected."""
+        with self.assertRaises(Exception):
+            Game(num_squares=40)
+        with self.assertRaises(Exception):
+            Game(num_squares=2)
+        self.assertEqual(Game(num_squares=4).num_squares, 4)
+
+    def test_rules_are_checked(self):
+        """A race needs two camels, and every die face is at least 1 so it cannot pass for an unrolled die."""
+        for rules in [{"colors": [Color.red]}, {"dice_range": (0, 2)}, {"dice_range": (3, 1)}, {"dice_range": (1,)}]:
+            with self.assertRaises(Exception):
+                Game(**rules)
+        self.assertEqual(Game(colors=[Color.red, Color.blue], dice_range=(2, 2)).faces, (2,))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from server import *
+
+
+class ServerTester(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = GameServer(ThreadPoolExecutor(max_workers=2))
+        port = await self.server.start_tcp()
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+        self.watcher_reader, self.watcher_writer = await asyncio.open_connection("127.0.0.1", port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        self.watcher_writer.close()
+        await self.server.close()
+
+    async def request(self, reader, writer, **request) -> dict:
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    async def test_play_and_broadcast(self):
+        """Moves are applied in turn order and broadcast to subscribers."""
+        reply = await self.request(self.reader, self.writer, op="create", players=["Alice", "Bob"])
+        table = reply["table"]
+        reply = await self.request(self.watcher_reader, self.watcher_writer, op="join", table=table)
+        self.assertEqual(reply["state"]["current"], "Alice")
+
+        reply = await self.request(self.reader, self.writer, op="move", table=table, player="Alice", move="bet", color="red")
+        self.assertTrue(reply["ok"])
+        self.assertEqual(reply["state"]["tickets"]["red"], 3)
+        self.assertEqual(reply["state"]["players"][0]["tickets"], [["red", 5]])
+
+        event = json.loads(await self.watcher_reader.readline())
+        self.assertEqual(event["event"], "state")
+        self.assertEqual(event["state"]["current"], "Bob")
+
+        reply = await self.request(self.reader, self.writer, op="move", table=table, player="Alice", move="roll")
+        self.assertFalse(reply["ok"])
+        reply = await self.request(self.reader, self.writer, op="move", table=table, player="Bob", move="roll")
+        self.assertTrue(reply["ok"])
+        self.assertEqual(reply["state"]["players"][1]["tokens"], 1)
+
+    async def test_ev(self):
+        """EV requests match Game.EV for the table."""
+        reply = await self.request(self.reader, self.writer, op="create", players=["Alice", "Bob"])
+        table = self.server.tables[reply["table"]]
+        reply = await self.request(self.reader, self.writer, op="ev", table=table.id)
+        self.assertEqual(reply["ev"], {color.name: value for color, value in table.game.EV().items()})
+
+    async def test_ev_prices_tent_at_request(self):
+        """A ticket taken while the leg is being enumerated does not change the EVs of the request already running."""
+        reply = await self.request(self.reader, self.writer, op="create", players=["Alice", "Bob"])
+        table = self.server.tables[reply["table"]]
+        expected = {color.name: value for color, value in table.game.EV().items()}
+        cache = Game.leg_cache
+        Game.leg_cache = None
+        server = GameServer(ThreadPoolExecutor(max_workers=1))
+        try:
+            # hold the only worker so the enumeration waits until the ticket is gone
+            release = threading.Event()
+            server.executor.submit(release.wait)
+            task = asyncio.create_task(server.ev(table))
+            await asyncio.sleep(0)
+            table.game.remove_ticket(BettingTicket(Color.red, 5))
+            release.set()
+            self.assertEqual(await task, expected)
+        finally:
+            Game.leg_cache = cache
+            await server.close()
+
+    async def test_errors(self):
+        reply = await self.request(self.reader, self.writer, op="state", table=99)
+        self.assertFalse(reply["ok"])
+        reply = await self.request(self.reader, self.writer, op="create", players=["Solo"])
+        self.assertFalse(reply["ok"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from simulator import *
+
+
+class SimulatorTester(unittest.TestCase):
+    def test_game_finishes(self):
+        """A game between two rollers ends with a camel on the last square."""
+        result = Simulator([RollStrategy(), RollStrategy()], seed=1).play_game()
+        self.assertGreaterEqual(result.legs, 1)
+        self.assertGreater(result.turns, 0)
+        # with nothing but rolls, every coin comes from a pyramid token
+        self.assertEqual(sum(result.coins), result.turns)
+
+    def test_many_players(self):
+        """Stats cover every seat for a table of four."""
+        strategies = [RollStrategy(), RandomStrategy(seed=3), RandomStrategy(seed=4), GreedyStrategy()]
+        stats = Simulator(strategies, seed=2).run(5)
+        self.assertEqual(stats["games"], 5)
+        self.assertEqual(len(stats["wins"]), 4)
+        self.assertEqual(sum(stats["wins"]) + stats["ties"], 5)
+        self.assertGreater(stats["games_per_second"], 0)
+
+    def test_seed_is_reproducible(self):
+        """Two runs with the same seed produce the same games."""
+        first = Simulator([RandomStrategy(seed=5), GreedyStrategy()], seed=9).run(3)
+        second = Simulator([RandomStrategy(seed=5), GreedyStrategy()], seed=9).run(3)
+        self.assertEqual(first["average_coins"], second["average_coins"])
+
+    def test_parallel_is_reproducible(self):
+        """Parallel runs only depend on the seed, not on the number of workers."""
+        strategies = [RandomStrategy(), RollStrategy()]
+        first = run_parallel(strategies, 6, seed=11, workers=1, chunk_size=2)
+        second = run_parallel(strategies, 6, seed=11, workers=2, chunk_size=2)
+        self.assertEqual(first["games"], 6)
+        self.assertEqual(first["average_coins"], second["average_coins"])
+        self.assertEqual(first["average_turns"], second["average_turns"])
+
+    def test_invalid_move(self):
+        """Strategies cannot take a ticket that is not in the tent."""
+        game = Game()
+        game.remove_ticket(BettingTicket(Color.red, 5))
+        simulator = Simulator([RollStrategy(), RollStrategy()])
+        with self.assertRaises(Exception):
+            simulator.play_move(game, Player("A"), (MoveType.bet, BettingTicket(Color.red, 5)))
+
+    def test_reruns_repeat_strategy_decisions(self):
+        """Running a seeded simulator again replays the seeded strategies too, not just the dice."""
+        simulator = Simulator([RandomStrategy(seed=5), GreedyStrategy()], seed=9)
+        self.assertEqual(simulator.run(5)["average_coins"], simulator.run(5)["average_coins"])
+
+    def test_chunks_get_their_own_strategy_streams(self):
+        """Parallel chunks reseed a seeded strategy per chunk, so they do not all make the same bets."""
+        strategy = RandomStrategy(seed=5)
+        simulator = Simulator([strategy, RollStrategy()])
+        draws = []
+        for number in [0, 1, 0]:
+            simulator.use_stream(2, number)
+            draws.append([strategy.rng.random() for _ in range(3)])
+        self.assertNotEqual(draws[0], draws[1])
+        self.assertEqual(draws[0], draws[2])
+
+    def test_strategy_is_abstract(self):
+        """A strategy has to implement `choose_move` before it can be created."""
+        with self.assertRaises(TypeError):
+            Strategy()
+
+if __name__ == '__main__':
+    unittest.main()
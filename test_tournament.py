@@ -0,0 +1,87 @@
+import os
+import json
+import tempfile
+import unittest
+from tournament import *
+
+
+class TournamentTester(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_round_robin_resumes(self):
+        """A resumed tournament only plays the missing matches and ends with the same ratings as an uninterrupted one."""
+        entrants = ["roll", "random", "greedy"]
+        full = Tournament(entrants, rounds=2, match_games=2, seed=5).run(self.path("full.jsonl"), workers=2)
+
+        Tournament(entrants, rounds=1, match_games=2, seed=5).run(self.path("resumed.jsonl"), workers=1)
+        # a run killed mid-write leaves half a line behind
+        with open(self.path("resumed.jsonl"), "a") as f:
+            f.write('{"match": 3, "rou')
+        played = []
+        resumed = Tournament(entrants, rounds=2, match_games=2, seed=5).run(
+            self.path("resumed.jsonl"), workers=2, progress=played.append
+        )
+
+        self.assertEqual(resumed, full)
+        self.assertEqual([result["match"] for result in played], [3, 4, 5])
+        with open(self.path("resumed.jsonl")) as f:
+            self.assertEqual([json.loads(line)["match"] for line in f], list(range(6)))
+
+    def test_swiss_csv(self):
+        """Swiss rounds pair neighbours in the standings, and CSV output reads back."""
+        entrants = ["roll", "random", "greedy"]
+        tournament = Tournament(entrants, rounds=2, match_games=2, pairing="swiss", seed=1)
+        self.assertEqual(tournament.pairings(), [("roll", "random")])
+        ratings = tournament.run(self.path("swiss.csv"), workers=1)
+        results = list(read_results(self.path("swiss.csv")))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[-1]["rating_a"], round(ratings[results[-1]["a"]], 2))
+        self.assertAlmostEqual(sum(ratings.values()), 1500 * 3)
+
+    def test_unknown_entrant(self):
+        with self.assertRaises(Exception):
+            Tournament(["roll", "nobody"], rounds=1)
+        with self.assertRaises(Exception):
+            Tournament(["roll", "greedy:depth=2"], rounds=1)
+
+    def test_entrant_arguments(self):
+        """One strategy can enter with different settings, and new entrants can be registered."""
+        self.assertEqual(make_entrant("greedy:margin=0.5").margin, 0.5)
+        self.assertEqual(make_entrant("expectimax:max_depth=1,time_budget=0.1").advisor.time_budget, 0.1)
+        register("cautious", lambda: make_entrant("greedy:margin=1"))
+        try:
+            results = []
+            entrants = ["greedy", "greedy:margin=0.5", "cautious"]
+            Tournament(entrants, rounds=1, match_games=1).run(self.path("variants.jsonl"), workers=1, progress=results.append)
+            self.assertEqual({(result["a"], result["b"]) for result in results}, {
+                ("greedy", "greedy:margin=0.5"), ("greedy", "cautious"), ("greedy:margin=0.5", "cautious")
+            })
+        finally:
+            del ENTRANTS["cautious"]
+
+    def test_swiss_rotates_without_rematches(self):
+        """Swiss rounds avoid rematches while they can, and every entrant sits out once before anyone sits out twice."""
+        entrants = ["roll", "random", "greedy", "greedy:margin=0.5", "greedy:margin=1"]
+        tournament = Tournament(entrants, rounds=5, pairing="swiss")
+        byes = []
+        matches = set()
+        for _ in range(5):
+            pairs = tournament.pairings()
+            byes += [name for name in entrants if not any(name in pair for pair in pairs)]
+            for a, b in pairs:
+                self.assertNotIn(frozenset((a, b)), matches)
+                matches.add(frozenset((a, b)))
+                tournament.apply({"a": a, "b": b, "games": 1, "wins_a": 1, "wins_b": 0, "ties": 0})
+            tournament.rounds_done += 1
+        self.assertEqual(sorted(byes), sorted(entrants))
+        self.assertEqual(len(matches), 10)
+
+if __name__ == '__main__':
+    unittest.main()
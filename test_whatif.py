@@ -0,0 +1,88 @@
+import unittest
+from random import Random
+from game import *
+from rng import GameRandom
+from cache import LegCache
+from whatif import WhatIf
+import leg
+from test_packed import random_board
+
+
+class WhatIfTester(unittest.TestCase):
+    def setUp(self):
+        Game.leg_cache = LegCache()
+        Game.rank_cache = LegCache(1024)
+        rng = Random(23)
+        self.games = []
+        for _ in range(6):
+            game = Game()
+            game.blocks = random_board(game, rng, spread=14)
+            game.available_dice = {color: rng.randint(0, 1) for color in Color}
+            self.games.append(game)
+
+    def tearDown(self):
+        Game.leg_cache = LegCache()
+        Game.rank_cache = LegCache(1024)
+        leg.shutdown_pools()
+
+    def test_matches_EV_in_order(self):
+        """Results come back in input order and match `Game.EV`, with duplicates only enumerated once."""
+        expected = [game.EV() for game in self.games]
+        Game.leg_cache = Game.rank_cache = None
+        runner = WhatIf(workers=1, window=16)
+        scenarios = self.games + self.games[:3]
+        self.assertEqual([evaluation.EVs for evaluation in runner.evaluate(scenarios)], expected + expected[:3])
+        self.assertEqual((runner.evaluated, runner.reused), (6, 3))
+
+    def test_packed_scenarios_in_pool(self):
+        """(board, dice) pairs are priced against a full tent, and a process pool gives the same results."""
+        runner = WhatIf(workers=2, window=3)
+        pairs = [(game.to_packed(), game.remaining_dice()) for game in self.games]
+        fresh = [Game.from_packed(state) for state, _ in pairs]
+        for game, original in zip(fresh, self.games):
+            game.available_dice = dict(original.available_dice)
+        self.assertEqual([evaluation.EVs for evaluation in runner.evaluate(iter(pairs))], [game.EV() for game in fresh])
+
+    def test_house_rules(self):
+        """Variant games are evaluated on their own track, dice and camels."""
+        variant = Game(num_squares=10, dice_range=(1, 2), colors=[Color.red, Color.blue, Color.green])
+        expected = variant.EV()
+        Game.leg_cache = LegCache()
+        evaluations = WhatIf(workers=1).evaluate([variant, self.games[0]])
+        self.assertEqual([evaluation.EVs for evaluation in evaluations], [expected, self.games[0].EV()])
+
+    def test_shares_game_caches(self):
+        """Scenarios go through the same caches as `Game.EV`, so positions ranked before are not enumerated again."""
+        Game.leg_cache = None
+        self.games[0].rank_probabilities()
+        runner = WhatIf(workers=1)
+        self.assertEqual([evaluation.EVs for evaluation in runner.evaluate(self.games[:1])], [self.games[0].EV()])
+        self.assertEqual((runner.evaluated, runner.reused), (0, 1))
+
+    def test_reused_game(self):
+        """A game reused for several scenarios is priced with the tent it had when it was passed in."""
+        game = self.games[0]
+        before = game.EV()
+
+        def scenarios():
+            yield game
+            game.make_bet(BettingTicket(Color.red, 5))
+            yield game
+
+        first, second = WhatIf(workers=1).evaluate(scenarios())
+        self.assertEqual(first.EVs, before)
+        self.assertEqual(second.EVs, game.EV())
+
+    def test_samples_big_scenarios(self):
+        """Scenarios too big to enumerate in the time budget are sampled, like `Game.evaluate` does."""
+        variant = Game(rng=GameRandom(3), colors=[*Color, HouseColor.white, HouseColor.cyan])
+        runner = WhatIf(workers=1, time_budget=0.2)
+        sampled, exact = runner.evaluate([variant, self.games[0]])
+        self.assertEqual((sampled.method, exact.method), ("sampled", "exact"))
+        self.assertGreater(sampled.samples, 0)
+        self.assertEqual(sampled.outcomes, math.factorial(7) * 3**7)
+        self.assertEqual((exact.error, exact.EVs), (0.0, self.games[0].EV()))
+        self.assertEqual((runner.sampled, runner.evaluated), (1, 1))
+
+if __name__ == '__main__':
+    unittest.main()
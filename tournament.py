@@ -0,0 +1,314 @@
+"""
+Round-robin and Swiss tournaments between strategies.
+
+A tournament is a sequence of rounds. Every round pairs up the entrants
+(every pair in a round-robin, neighbours by rating in a Swiss round) and
+plays a match of `match_games` two-player games per pairing, with the seats
+swapped every game. Matches run on a process pool, each on its own random
+stream derived from the tournament seed and the match number, so a
+tournament is reproducible however many workers play it.
+
+Results are applied to the Elo ratings and appended to the output file
+(CSV or JSONL, by extension) in match order as they complete, so memory
+stays flat however long the tournament is. Rerunning with the same output
+file resumes: the matches already in the file are replayed into the
+ratings instead of being played again.
+
+An entrant is a name from `ENTRANTS`, optionally with keyword arguments for
+its strategy, e.g. "greedy:margin=0.5" or "expectimax:max_depth=1,time_budget=0.1",
+so one strategy can enter several times with different settings. Other
+strategies can be added with `register`.
+"""
+
+import ast
+import csv
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from game import *
+from simulator import Simulator, Strategy, STRATEGIES
+from advisor import ExpectimaxStrategy
+
+ENTRANTS = {**STRATEGIES, "expectimax": ExpectimaxStrategy}
+FIELDS = ["match", "round", "a", "b", "games", "wins_a", "wins_b", "ties", "coins_a", "coins_b", "rating_a", "rating_b"]
+
+
+def register(name: str, factory):
+    """Adds an entrant: `factory` is called with the entrant's keyword arguments and returns a `Strategy`.
+    Matches are played in worker processes, so register entrants when your module is imported, not in `__main__`."""
+    if ":" in name:
+        raise Exception(f"Entrant names cannot contain ':', got {name!r}.")
+    ENTRANTS[name] = factory
+
+
+def make_entrant(entrant: str) -> Strategy:
+    """Returns the strategy of an entrant such as "greedy" or "greedy:margin=0.5".
+    Argument values are Python literals; anything else is passed as a string."""
+    name, _, arguments = entrant.partition(":")
+    if name not in ENTRANTS:
+        raise Exception(f"Unknown entrant {name!r}, expected one of {', '.join(ENTRANTS)}.")
+    kwargs = {}
+    for argument in filter(None, arguments.split(",")):
+        key, equals, value = argument.partition("=")
+        if not equals:
+            raise Exception(f"Entrant arguments are key=value pairs, got {argument!r} in {entrant!r}.")
+        try:
+            kwargs[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            kwargs[key.strip()] = value.strip()
+    return ENTRANTS[name](**kwargs)
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    """Returns the Elo expected score of a player rated `rating` against `opponent`."""
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+
+def play_match(a: str, b: str, seed: int, number: int, games: int) -> dict:
+    """Plays match `number`: `games` games between entrants `a` and `b`, alternating who sits first."""
+    strategies = [make_entrant(a), make_entrant(b)]
+    simulator = Simulator(strategies)
+    simulator.use_stream(seed, number)
+
+    wins = [0, 0]
+    coins = [0, 0]
+    ties = 0
+    for game in range(games):
+        # on odd games b sits in the first seat
+        order = [0, 1] if game % 2 == 0 else [1, 0]
+        simulator.strategies = [strategies[i] for i in order]
+        result = simulator.play_game()
+        winner = result.winner()
+        if winner is None:
+            ties += 1
+        else:
+            wins[order[winner]] += 1
+        for seat, entrant in enumerate(order):
+            coins[entrant] += result.coins[seat]
+
+    return {
+        "a": a,
+        "b": b,
+        "games": games,
+        "wins_a": wins[0],
+        "wins_b": wins[1],
+        "ties": ties,
+        "coins_a": coins[0],
+        "coins_b": coins[1],
+    }
+
+
+class Tournament:
+    """Schedules matches between entrants and keeps their ratings."""
+
+    def __init__(
+        self,
+        entrants: list[str],
+        rounds: int,
+        match_games: int = 100,
+        pairing: str = "round-robin",
+        seed: int = 0,
+        k_factor: float = 32,
+    ):
+        """`entrants` are names from `ENTRANTS`, with arguments if needed (see `make_entrant`). Every round plays one
+        match of `match_games` games per pairing. `pairing` is "round-robin" or "swiss".
+        Ratings start at 1500 and move by up to `k_factor` per match."""
+        for entrant in entrants:
+            # fail now rather than in a worker halfway through the tournament
+            make_entrant(entrant)
+        if pairing not in ("round-robin", "swiss"):
+            raise Exception(f"Unknown pairing {pairing!r}, expected 'round-robin' or 'swiss'.")
+        if len(set(entrants)) != len(entrants) or len(entrants) < 2:
+            raise Exception("A tournament needs at least two different entrants.")
+        self.entrants = entrants
+        self.rounds = rounds
+        self.match_games = match_games
+        self.pairing = pairing
+        self.seed = seed
+        self.k_factor = k_factor
+        self.ratings = {name: 1500.0 for name in entrants}
+        self.matches = 0
+        self.met = Counter()  # how many matches each pair of entrants has played, keyed by frozenset
+        self.appearances = Counter()  # how many matches each entrant has played, one per round in a Swiss tournament
+        self.rounds_done = 0
+
+    def pairings(self) -> list[tuple[str, str]]:
+        """Returns the matches of the next round."""
+        if self.pairing == "round-robin":
+            return [
+                (a, b) for i, a in enumerate(self.entrants) for b in self.entrants[i + 1 :]
+            ]
+        # Swiss: neighbours in the standings play each other, avoiding rematches while that is possible
+        standings = sorted(self.entrants, key=lambda name: (-self.ratings[name], self.entrants.index(name)))
+        if len(standings) % 2:
+            # the bye goes to the lowest-placed entrant among those who have sat out the fewest rounds
+            byes = {name: self.rounds_done - self.appearances[name] for name in standings}
+            fewest = min(byes.values())
+            standings.remove([name for name in standings if byes[name] == fewest][-1])
+        limit = 0
+        while True:
+            pairs = self.swiss_pairs(standings, limit)
+            if pairs is not None:
+                return pairs
+            limit += 1
+
+    def swiss_pairs(self, standings: list[str], limit: int) -> list[tuple[str, str]]:
+        """Pairs each entrant with the highest-placed one below it that it has met at most `limit` times,
+        backtracking when that leaves someone without an opponent. Returns None if no such pairing exists."""
+        if not standings:
+            return []
+        first, rest = standings[0], standings[1:]
+        for i, opponent in enumerate(rest):
+            if self.met[frozenset((first, opponent))] > limit:
+                continue
+            pairs = self.swiss_pairs(rest[:i] + rest[i + 1 :], limit)
+            if pairs is not None:
+                return [(first, opponent)] + pairs
+        return None
+
+    def apply(self, result: dict):
+        """Updates the ratings with a finished match."""
+        a, b = result["a"], result["b"]
+        score = (result["wins_a"] + 0.5 * result["ties"]) / result["games"]
+        change = self.k_factor * (score - expected_score(self.ratings[a], self.ratings[b]))
+        self.ratings[a] += change
+        self.ratings[b] -= change
+        result["rating_a"] = round(self.ratings[a], 2)
+        result["rating_b"] = round(self.ratings[b], 2)
+        self.matches += 1
+        self.met[frozenset((a, b))] += 1
+        self.appearances.update((a, b))
+
+    def run(self, path: str, workers: int = None, progress=None):
+        """Plays the tournament, appending every match to `path` and resuming from it if it already has matches.
+        `progress` is called with each match result as it is recorded. Returns the final ratings."""
+        repair(path)
+        done = read_results(path)
+        with ResultWriter(path) as writer, ProcessPoolExecutor(max_workers=workers) as pool:
+            # keep a few matches per worker queued so the pool never runs dry between results
+            window = 4 * (workers or os.cpu_count() or 1)
+            for round_number in range(self.rounds):
+                queue = deque()
+                for a, b in self.pairings():
+                    number = self.matches + len(queue)
+                    recorded = next(done, None)
+                    if recorded is not None:
+                        if recorded["match"] != number or (recorded["a"], recorded["b"]) != (a, b):
+                            raise Exception(f"{path} does not match this tournament at match {number}.")
+                        queue.append((number, recorded))
+                        continue
+                    queue.append((number, pool.submit(play_match, a, b, self.seed, number, self.match_games)))
+                    while len(queue) > window or (queue and isinstance(queue[0][1], dict)):
+                        self.record(queue.popleft(), round_number, writer, progress)
+                while queue:
+                    self.record(queue.popleft(), round_number, writer, progress)
+                self.rounds_done += 1
+        return dict(self.ratings)
+
+    def record(self, job: tuple, round_number: int, writer: "ResultWriter", progress):
+        """Applies one queued match in order, writing it out unless it was read back from the file."""
+        number, outcome = job
+        if isinstance(outcome, dict):
+            self.apply(outcome)
+            return
+        result = {"match": number, "round": round_number, **outcome.result()}
+        self.apply(result)
+        writer.write(result)
+        if progress is not None:
+            progress(result)
+
+
+def repair(path: str):
+    """Drops a partially written last line from `path`, left behind if a run was killed mid-write."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        # walk back from the end to the last complete line
+        position = size
+        while position > 0:
+            start = max(0, position - 4096)
+            f.seek(start)
+            chunk = f.read(position - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                complete = start + newline + 1
+                break
+            position = start
+        else:
+            complete = 0
+        if complete != size:
+            f.truncate(complete)
+
+
+def read_results(path: str):
+    """Yields the matches already recorded in `path`."""
+    if not os.path.exists(path):
+        return
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {key: (row[key] if key in ("a", "b") else float(row[key]) if "rating" in key else int(row[key])) for key in FIELDS}
+        else:
+            for line in f:
+                yield json.loads(line)
+
+
+class ResultWriter:
+    """Appends match results to a CSV or JSONL file, one line per match, flushed as it goes."""
+
+    def __init__(self, path: str):
+        self.csv = path.endswith(".csv")
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="")
+        if self.csv:
+            self.writer = csv.DictWriter(self.file, FIELDS)
+            if new:
+                self.writer.writeheader()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, result: dict):
+        if self.csv:
+            self.writer.writerow(result)
+        else:
+            self.file.write(json.dumps({key: result[key] for key in FIELDS}) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play a tournament between Camel Up strategies.")
+    parser.add_argument(
+        "entrants",
+        nargs="+",
+        help=f"the strategies taking part, one of {', '.join(ENTRANTS)} with optional arguments, e.g. greedy:margin=0.5",
+    )
+    parser.add_argument("--out", required=True, help="CSV or JSONL file to stream results to, resumed if it exists")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--match-games", type=int, default=100, help="games per match")
+    parser.add_argument("--pairing", choices=["round-robin", "swiss"], default="round-robin")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes to play on (default: every core)")
+    args = parser.parse_args()
+
+    tournament = Tournament(args.entrants, args.rounds, args.match_games, args.pairing, args.seed)
+    ratings = tournament.run(
+        args.out,
+        args.workers,
+        progress=lambda result: print(f"\rmatch {result['match'] + 1}", end="", flush=True),
+    )
+    print()
+    for name, rating in sorted(ratings.items(), key=lambda item: -item[1]):
+        print(f"{name}: {rating:.0f}")
@@ -0,0 +1,117 @@
+"""
+Batch EV evaluation of many hypothetical positions.
+
+`WhatIf.evaluate` takes any iterable of scenarios and yields the
+`Evaluation` of each one, in input order, as soon as it is ready. A
+scenario is either a `Game` (its board, dice, ticket tent and rules are
+used) or a `(packed board, remaining dice bitmask)` pair, priced against a
+full tent.
+
+Each scenario is worked out like `Game.evaluate` would: exactly when its
+outcomes are already known or enumerating them fits in the time budget,
+otherwise by sampling legs, so a big variant never builds its full
+outcome space. Exact scenarios are reduced to their canonical cache key
+first, so the same relative position is only enumerated once, whether it
+repeats inside the batch or was already in the game's leg table or caches.
+Enumerations run on a process pool, and at most `window` scenarios are held
+in memory at a time, so the input can be a lazy stream of any length.
+
+    runner = WhatIf(workers=4)
+    for evaluation in runner.evaluate(Game.from_packed(state) for state in states):
+        ...
+"""
+
+import os
+from collections import deque
+from game import *
+import leg
+
+
+class WhatIf:
+    """Evaluates streams of scenarios on a shared process pool."""
+
+    def __init__(
+        self,
+        workers: int = None,
+        window: int = 1024,
+        method: str = None,
+        time_budget: float = None,
+        target_error: float = None,
+    ):
+        """Uses `workers` processes (all cores by default, 1 to stay in-process), keeps at most `window` scenarios
+        in flight, and enumerates with the leg engine `method` (`Game.ev_method` by default). `time_budget` and
+        `target_error` apply to each scenario like in `Game.evaluate`, defaulting to the scenario game's own."""
+        assert window > 0
+        self.workers = workers or os.cpu_count() or 1
+        self.window = window
+        self.method = method or Game.ev_method
+        self.time_budget = time_budget
+        self.target_error = target_error
+        self.tent = Game()  # prices (board, dice) scenarios against a full tent
+        self.evaluated = 0
+        self.reused = 0
+        self.sampled = 0
+
+    def scenario(self, item) -> tuple[Game, int, int]:
+        """Returns the game to price a scenario with, and its packed board and remaining dice bitmask."""
+        if isinstance(item, Game):
+            return item, item.to_packed(), item.remaining_dice()
+        state, remaining = item
+        return self.tent, state, remaining
+
+    def evaluate(self, scenarios):
+        """Yields the `Evaluation` (like `Game.evaluate`) of every scenario, in the order they were given."""
+        pool = leg.get_pool(self.workers) if self.workers > 1 else None
+
+        pending = deque()  # an Evaluation already worked out, or (game, tickets, key, outcomes), in input order
+        running = {}  # key -> [future or entry, number of pending scenarios using it]
+
+        def finish():
+            item = pending.popleft()
+            if isinstance(item, Evaluation):
+                return item
+            game, tickets, key, outcomes = item
+            job = running[key]
+            entry = job[0]
+            if not isinstance(entry, tuple):
+                entry = job[0] = game.store_rank_tallies(key, entry.result())
+            job[1] -= 1
+            if job[1] == 0:
+                del running[key]
+            return Evaluation(game.price_tickets(*game.by_color(*entry), tickets), "exact", 0.0, outcomes)
+
+        for item in scenarios:
+            game, state, remaining = self.scenario(item)
+            # the tent is snapshotted now, in case the caller reuses the game for the next scenario
+            tickets = game.ticket_status()
+            # every scenario is evaluated under its own game's rules, and looked up in its table and caches
+            key, entry = game.cached_leg_outcomes(state, remaining)
+            time_budget = game.ev_time_budget if self.time_budget is None else self.time_budget
+            method, outcomes = game.evaluation_method(state, remaining, time_budget)
+            if key in running or entry is not None:
+                method = "exact"
+
+            if method == "sampled":
+                pending.append(game.sample_evaluation(state, remaining, tickets, time_budget, self.target_error))
+                self.sampled += 1
+            elif key in running:
+                running[key][1] += 1
+                self.reused += 1
+            else:
+                if entry is not None:
+                    self.reused += 1
+                elif pool is not None:
+                    entry = pool.submit(Game.rank_tallies, key, game.num_squares, self.method)
+                    self.evaluated += 1
+                else:
+                    entry = game.store_rank_tallies(key, Game.rank_tallies(key, game.num_squares, self.method))
+                    self.evaluated += 1
+                running[key] = [entry, 1]
+            if method == "exact":
+                pending.append((game, tickets, key, outcomes))
+
+            if len(pending) >= self.window:
+                yield finish()
+
+        while pending:
+            yield finish()